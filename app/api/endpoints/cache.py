@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Request
+from app.core.dependencies import get_api_key
+from app.api.schemas.cache import CacheStats
+from app.api.schemas.response import SingleResponse
+from app.api.utils.response_builder import create_single_response
+from app.api.utils.response_cache import response_cache
+
+router = APIRouter(prefix="/cache", tags=["Cache"])
+
+
+@router.get("/stats", response_model=SingleResponse[CacheStats])
+def get_cache_stats(
+    request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Get the hit and miss counters of the response cache.
+    """
+    return create_single_response(CacheStats(**response_cache.stats()), request)
\ No newline at end of file
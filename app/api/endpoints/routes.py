@@ -8,6 +8,8 @@ from app.api.schemas.shape import RouteShape
 from app.api.schemas.response import SingleResponse, ListResponse, SimpleListResponse
 from app.api.utils.pagination import create_paginated_response
 from app.api.utils.response_builder import create_single_response, create_list_response, create_simple_list_response, build_route_links
+from app.api.utils.etag import static_feed_cache
+from app.api.utils.response_cache import CachedResponse, cached_response
 from app.services.route_service import RouteService
 from collections import defaultdict
 from datetime import datetime
@@ -22,7 +24,8 @@ def get_routes(
     page: int = Query(0, ge=0, description="Page number (0-indexed)"),
     size: int = Query(100, ge=1, le=100, description="Page size (1-100)"),
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache)
 ):
     """
     Get all routes.
@@ -47,7 +50,8 @@ def get_route_by_id(
     route_id: str,
     service_id: Optional[str] = Query(None, description="Filter directions by comma-separated service IDs"),
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache)
 ):
     """
     Get a specific route by it's ID.
@@ -70,11 +74,17 @@ def get_route_shapes(
     route_id: str,
     direction_id: Optional[int] = Query(None, description="Filter shapes by direction_id"),
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache),
+    cache: CachedResponse = Depends(cached_response(ttl_seconds=3600))
 ):
     """
     Get all shapes/stop points for a specific route.
     """
+    cached = cache.response()
+    if cached is not None:
+        return cached
+    
     route = RouteService.get_route_by_id(db=db, route_id=route_id, include_directions=False, service_ids=None)
     if route is None:
         raise HTTPException(status_code=404, detail="Route not found")
@@ -85,7 +95,7 @@ def get_route_shapes(
         direction_id=direction_id
     )
     
-    return create_simple_list_response(shapes, request)
+    return cache.store(create_simple_list_response(shapes, request))
 
 
 @router.get("/{route_id}/stops", response_model=RouteStopsGroupedResponse)
@@ -94,11 +104,17 @@ def get_route_stops(
     route_id: str,
     direction_id: Optional[int] = Query(None, description="Filter stops by direction_id"),
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache),
+    cache: CachedResponse = Depends(cached_response(ttl_seconds=3600))
 ):
     """
     Get all stops for a specific route, grouped by direction_id.
     """
+    cached = cache.response()
+    if cached is not None:
+        return cached
+    
     route = RouteService.get_route_by_id(db=db, route_id=route_id, include_directions=False, service_ids=None)
     if route is None:
         raise HTTPException(status_code=404, detail="Route not found")
@@ -132,10 +148,10 @@ def get_route_stops(
     
     from app.api.schemas.route import RouteStopsGroupedData
     
-    return RouteStopsGroupedResponse(
+    return cache.store(RouteStopsGroupedResponse(
         data=RouteStopsGroupedData(
             route_id=route_id,
             directions=direction_groups
         ),
         timestamp=datetime.utcnow()
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
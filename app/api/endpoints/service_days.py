@@ -7,6 +7,7 @@ from app.core.dependencies import get_api_key
 from app.api.schemas.service_day import ServiceDay
 from app.api.schemas.response import SimpleListResponse, SingleResponse
 from app.api.utils.response_builder import create_simple_list_response, create_single_response
+from app.api.utils.etag import static_feed_cache
 from app.services.service_day_service import ServiceDayService
 
 router = APIRouter(prefix="/service-days", tags=["Service Days"])
@@ -16,7 +17,8 @@ router = APIRouter(prefix="/service-days", tags=["Service Days"])
 def get_service_days(
     request: Request,
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache)
 ):
     """
     Get all service days.
@@ -32,7 +34,8 @@ def get_service_day_by_id(
     request: Request,
     id: str,
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache)
 ):
     """
     Get a specific service day by its service_id or service_type.
@@ -9,6 +9,8 @@ from app.api.schemas.arrival import ScheduledArrivalResponse, RealtimeArrivalsRe
 from app.api.schemas.response import SingleResponse
 from app.api.utils.pagination import create_paginated_response
 from app.api.utils.response_builder import create_single_response, build_stop_links
+from app.api.utils.etag import static_feed_cache
+from app.api.utils.response_cache import CachedResponse, cached_response
 from app.services.stop_service import StopService
 from app.services.service_day_service import ServiceDayService
 
@@ -22,18 +24,24 @@ def get_stops(
     page: int = Query(0, ge=0, description="Page number"),
     size: Optional[int] = Query(None, ge=1, le=100, description="Page size (1-100). If not provided, returns all stops."),
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache),
+    cache: CachedResponse = Depends(cached_response(ttl_seconds=600))
 ):
     """
     Get all stops.
     If size is not provided, returns all stops without pagination.
     """
+    cached = cache.response()
+    if cached is not None:
+        return cached
+    
     stops, total = StopService.get_stops(db=db, zone_id=zone_id, page=page, size=size)
     
     effective_size = size if size is not None else total
     effective_page = 0 if size is None else page
     
-    return create_paginated_response(request, stops, total, effective_page, effective_size, StopResponse)
+    return cache.store(create_paginated_response(request, stops, total, effective_page, effective_size, StopResponse))
 
 
 @router.get("/{stop_id}", response_model=SingleResponse[Stop])
@@ -41,7 +49,8 @@ def get_stop_by_id(
     request: Request,
     stop_id: str,
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache)
 ):
     """
     Get a specific stop by it's ID.
@@ -70,10 +79,11 @@ def get_scheduled_arrivals(
     Get scheduled arrivals for a specific stop.
     
     By default (all=false), returns only arrivals in the next 24 hours, automatically
-    determining the service_id(s) for today and tomorrow. Any passed service_id parameter
-    is ignored in this mode.
+    determining the service_id(s) for yesterday (trips past midnight), today and tomorrow.
+    Any passed service_id parameter is ignored in this mode.
     
-    If all=true, returns all scheduled arrivals ordered by arrival time.
+    If all=true, returns all scheduled arrivals ordered by arrival time within the service
+    day (arrivals after midnight come last).
     Optionally filter by route_id and/or service_id when using all=true.
     """
     stop = StopService.get_stop_by_id(db=db, stop_id=stop_id)
@@ -91,6 +101,8 @@ def get_scheduled_arrivals(
         window_start = now
         window_end = now + timedelta(hours=24)
 
+        yesterday = now.date() - timedelta(days=1)
+        yesterday_service_id = ServiceDayService.get_current_service_id(db=db, on_date=yesterday)
         today_service_id = ServiceDayService.get_current_service_id(db=db, on_date=now.date())
         tomorrow_service_id = ServiceDayService.get_current_service_id(db=db, on_date=window_end.date())
 
@@ -98,6 +110,9 @@ def get_scheduled_arrivals(
             raise HTTPException(status_code=404, detail="No service day found for the current date")
 
         service_id_dates = {}
+        # Yesterday's trips that run past midnight (GTFS times after 24:00:00)
+        if yesterday_service_id:
+            service_id_dates.setdefault(yesterday_service_id, []).append(yesterday)
         if today_service_id:
             service_id_dates.setdefault(today_service_id, []).append(now.date())
         if tomorrow_service_id:
@@ -8,6 +8,8 @@ from app.api.schemas.shape import TripShapesResponse
 from app.api.schemas.response import SimpleListResponse, SingleResponse
 from app.api.utils.pagination import create_paginated_response
 from app.api.utils.response_builder import create_simple_list_response, create_single_response, build_trip_links
+from app.api.utils.etag import static_feed_cache
+from app.api.utils.response_cache import CachedResponse, cached_response
 from app.services.trip_service import TripService
 
 router = APIRouter(prefix="/trips", tags=["Trips"])
@@ -23,7 +25,8 @@ def get_trips(
     page: int = Query(0, ge=0),
     size: int = Query(100, ge=1, le=100),
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache)
 ):
     """
     Get trips with optional filtering and pagination.
@@ -46,7 +49,8 @@ def get_trip_by_id(
     request: Request,
     trip_id: str,
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache)
 ):
     """
     Get a specific trip by its id.
@@ -64,17 +68,23 @@ def get_trip_shapes(
     request: Request,
     trip_id: str,
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache),
+    cache: CachedResponse = Depends(cached_response(ttl_seconds=3600))
 ):
     """
     Get all shape points for a specific trip by its id.
     Returns the shape id and an ordered list of shape points (coordinates) that define the trip's route.
     """
+    cached = cache.response()
+    if cached is not None:
+        return cached
+    
     shapes = TripService.get_trip_shapes(db=db, trip_id=trip_id)
     if shapes is None:
         raise HTTPException(status_code=404, detail="Trip shapes not found")
     
-    return create_single_response(shapes, request)
+    return cache.store(create_single_response(shapes, request))
 
 
 @router.get("/{trip_id}/stops", response_model=SimpleListResponse[TripStop])
@@ -82,15 +92,21 @@ def get_trip_stops(
     request: Request,
     trip_id: str,
     db: Session = Depends(get_db),
-    api_key: str = Depends(get_api_key)
+    api_key: str = Depends(get_api_key),
+    etag: Optional[str] = Depends(static_feed_cache),
+    cache: CachedResponse = Depends(cached_response(ttl_seconds=3600))
 ):
     """
     Get all stops for a specific trip by its id.
     """
+    cached = cache.response()
+    if cached is not None:
+        return cached
+    
     # Verify trip exists
     trip = TripService.get_trip_by_trip_id(db=db, trip_id=trip_id)
     if trip is None:
         raise HTTPException(status_code=404, detail="Trip not found")
     
     stops = TripService.get_trip_stops(db=db, trip_id=trip_id)
-    return create_simple_list_response(stops, request)
\ No newline at end of file
+    return cache.store(create_simple_list_response(stops, request))
\ No newline at end of file
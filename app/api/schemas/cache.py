@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+
+class CacheStats(BaseModel):
+    entries: int = Field(..., description="Responses currently cached")
+    size_bytes: int = Field(..., description="Size of the cached responses")
+    max_bytes: int = Field(...)
+    hits: int = Field(...)
+    misses: int = Field(...)
+    evictions: int = Field(..., description="Responses dropped to stay under max_bytes")
+    expirations: int = Field(..., description="Responses dropped when their TTL ran out")
+    invalidations: int = Field(..., description="Times the cache was dropped after a feed reload")
\ No newline at end of file
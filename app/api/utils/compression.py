@@ -0,0 +1,164 @@
+import gzip
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; responses are then only gzipped
+    brotli = None
+
+# In order of preference when a client accepts several equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def preferred_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    The supported content coding an Accept-Encoding header prefers, or None
+    when the response should not be compressed.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """body compressed at the response cache's levels (see Settings)."""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.RESPONSE_CACHE_BROTLI_QUALITY)
+    # mtime=0 keeps the output the same for the same body
+    return gzip.compress(body, compresslevel=settings.RESPONSE_CACHE_GZIP_LEVEL, mtime=0)
+
+
+def compressed_variants(body: bytes) -> Dict[str, bytes]:
+    """The body in every supported content coding."""
+    return {encoding: compress(body, encoding) for encoding in SUPPORTED_ENCODINGS}
+
+
+class StreamCompressor:
+    """
+    Incremental compressor for one response body. Every chunk but the last
+    is flushed, so a client can decode what it has received so far.
+    """
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            compressed = self._compressor.process(chunk)
+            return compressed + (self._compressor.finish() if last else self._compressor.flush())
+        compressed = self._compressor.compress(chunk)
+        return compressed + self._compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    media_type = (content_type or "").partition(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith(("json", "javascript", "xml"))
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and text responses of at least minimum_size bytes with
+    the content coding the request's Accept-Encoding prefers (brotli or
+    gzip). Responses that already have a Content-Encoding, such as the
+    pre-compressed cached ones, are sent as they are. Streaming responses
+    are compressed message by message, so each one still reaches the client
+    as soon as it is sent.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = preferred_encoding(Headers(scope=scope).get("accept-encoding"))
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or message["status"] == 206 or not is_compressible(headers.get("content-type")):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body message shows whether
+                    # the response is worth compressing
+                    start = message
+                return
+
+            if compressor is not None and message["type"] == "http.response.body":
+                message["body"] = compressor.compress(message.get("body", b""), last=not message.get("more_body", False))
+                await send(message)
+                return
+
+            if start is None or message["type"] != "http.response.body":
+                # e.g. a file sent with http.response.pathsend
+                passthrough = True
+                if start is not None:
+                    await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(raw=start["headers"])
+            if len(body) < self.minimum_size and not more_body:
+                passthrough = True
+            else:
+                vary = headers.get("vary")
+                if vary is None:
+                    headers["Vary"] = "Accept-Encoding"
+                elif "accept-encoding" not in vary.lower():
+                    headers["Vary"] = f"{vary}, Accept-Encoding"
+                if encoding is None:
+                    passthrough = True
+                else:
+                    compressor = StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                    message["body"] = compressor.compress(body, last=not more_body)
+                    headers["Content-Encoding"] = encoding
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        headers["Content-Length"] = str(len(message["body"]))
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -5,9 +5,18 @@ from fastapi.encoders import jsonable_encoder
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from typing import List
 from app.api.schemas.response import ErrorResponse, ErrorDetail
+from app.api.utils.json_response import FastJSONResponse
+from app.core.config import settings
 import uuid
 
 
+def error_json_response(status_code: int, error_response: ErrorResponse) -> JSONResponse:
+    content = error_response.model_dump(exclude_none=True)
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(status_code=status_code, content=content)
+    return JSONResponse(status_code=status_code, content=jsonable_encoder(content))
+
+
 async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> JSONResponse:
     error_response = ErrorResponse(
         error=True,
@@ -15,10 +24,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException)
         status_code=exc.status_code,
         path=str(request.url.path)
     )
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=jsonable_encoder(error_response.model_dump(exclude_none=True))
-    )
+    return error_json_response(exc.status_code, error_response)
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
@@ -38,10 +44,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         details=details,
         path=str(request.url.path)
     )
-    return JSONResponse(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=jsonable_encoder(error_response.model_dump(exclude_none=True))
-    )
+    return error_json_response(status.HTTP_422_UNPROCESSABLE_ENTITY, error_response)
 
 
 async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
@@ -52,7 +55,4 @@ async def general_exception_handler(request: Request, exc: Exception) -> JSONRes
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         path=str(request.url.path)
     )
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content=jsonable_encoder(error_response.model_dump(exclude_none=True))
-    )
\ No newline at end of file
+    return error_json_response(status.HTTP_500_INTERNAL_SERVER_ERROR, error_response)
\ No newline at end of file
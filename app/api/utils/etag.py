@@ -0,0 +1,79 @@
+import hashlib
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from fastapi import Depends, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api.utils.compression import preferred_encoding
+from app.core.config import settings
+from app.core.database import get_db
+from app.data_source.gtfs.repository import get_feed_repository
+
+
+class NotModified(Exception):
+    """Raised when the client already holds the current version of a response."""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+
+# Responses differ by content coding, and a shared cache must not replay a
+# response stored for one API key to a request without it
+VARY = "Accept-Encoding, X-API-Key"
+
+
+def canonical_url(request: Request) -> str:
+    # The query parameters in a fixed order
+    params = sorted(request.query_params.multi_items())
+    return str(request.url.replace(query=urlencode(params)))
+
+
+def feed_etag(feed_version: str, request: Request) -> str:
+    # Every content coding of a response is a representation with its own ETag
+    encoding = preferred_encoding(request.headers.get("accept-encoding")) or "identity"
+    digest = hashlib.sha256(f"{feed_version}\n{canonical_url(request)}\n{encoding}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    tags = {tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def static_feed_cache(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+) -> Optional[str]:
+    """
+    Conditional GET for endpoints that only serve the static feed.
+
+    The ETag is derived from the version of the loaded feed and the
+    canonical request, so it changes with every reload. A request whose
+    If-None-Match holds it is answered with 304 (see not_modified_handler)
+    before the endpoint runs. Declare it after the API key dependency so
+    unauthenticated requests are still rejected.
+    """
+    feed_version = get_feed_repository(db).version
+    if feed_version is None:
+        return None
+
+    etag = feed_etag(feed_version, request)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.STATIC_CACHE_MAX_AGE}",
+        "Vary": VARY,
+    }
+    if etag_matches(etag, request.headers.get("if-none-match")):
+        raise NotModified(headers)
+
+    response.headers.update(headers)
+    return etag
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers=exc.headers)
@@ -0,0 +1,29 @@
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; content is then encoded with jsonable_encoder
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse that renders without jsonable_encoder: pydantic models are
+    dumped by pydantic-core, anything else (dicts and lists of plain values,
+    dates included) by orjson. The output is the same as JSONResponse's.
+
+    Endpoints with a response_model don't need it: FastAPI already dumps
+    their models with pydantic-core, and returning another response class
+    from the route would give that up.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json(by_alias=True).encode()
+        if orjson is not None:
+            return orjson.dumps(content)
+        return super().render(jsonable_encoder(content))
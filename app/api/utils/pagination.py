@@ -3,6 +3,7 @@ from typing import Optional, TypeVar, List, Type, Tuple
 from urllib.parse import urlencode
 from datetime import datetime
 from app.api.schemas.pagination import PageInfo, Links, PaginatedResponse
+from app.core.config import settings
 
 T = TypeVar('T')
 
@@ -73,6 +74,16 @@ def create_paginated_response(
 ) -> PaginatedResponse[T]:
     page_info, links, timestamp = create_pagination_info(request, total, page, size)
     
+    # The items are already models of the response's item type, built by the
+    # services, so validating them again can be skipped
+    if settings.FAST_JSON_RESPONSES:
+        return response_class.model_construct(
+            data=items,
+            page=page_info,
+            links=links,
+            timestamp=timestamp
+        )
+    
     return response_class(
         data=items,
         page=page_info,
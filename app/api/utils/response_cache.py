@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Dict, NamedTuple, Optional
+
+from fastapi import Depends, Request, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.api.utils.compression import compressed_variants, preferred_encoding
+from app.api.utils.etag import VARY, canonical_url
+from app.data_source.gtfs.repository import FeedRepository, get_feed_repository
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    # The body in every supported content coding, compressed when it was stored
+    encoded: Dict[str, bytes]
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(encoded) for encoded in self.encoded.values())
+
+
+class ResponseCache:
+    """
+    Serialised response bodies, with their gzip (and brotli) variants, by
+    canonical request URL, evicted least recently used first once their
+    total size exceeds max_bytes.
+
+    Every entry has the TTL of the endpoint that stored it, and the whole
+    cache is dropped when the feed repository changes, i.e. after a reload.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._size = 0
+        self._feed: Optional[FeedRepository] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str, feed: FeedRepository) -> Optional[CachedBody]:
+        with self._lock:
+            self._use_feed(feed)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, body: bytes, ttl_seconds: float, feed: FeedRepository) -> CachedBody:
+        entry = CachedBody(body, compressed_variants(body), monotonic() + ttl_seconds)
+        if entry.size > self.max_bytes:
+            return entry
+        with self._lock:
+            self._use_feed(feed)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _use_feed(self, feed: FeedRepository) -> None:
+        # Responses built from a previous feed are never served again
+        if feed is not self._feed:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._size = 0
+            self._feed = feed
+
+    def _remove(self, key: str) -> None:
+        self._size -= self._entries.pop(key).size
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_BYTES)
+
+
+class CachedResponse:
+    """
+    Handle an endpoint gets from cached_response(): response() is the cached
+    body if there is one, otherwise store() serialises the response model,
+    keeps it and returns it. Either is sent in the content coding the
+    client prefers, from the variants compressed when it was stored.
+    """
+
+    def __init__(self, key: str, ttl_seconds: float, feed: FeedRepository, encoding: Optional[str], headers: Response):
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self.feed = feed
+        self.encoding = encoding
+        self.entry = response_cache.get(key, feed)
+        # Headers dependencies set (e.g. the ETag) are only added by FastAPI
+        # to responses it serialises itself, so they are copied over
+        self._headers = headers
+
+    def response(self) -> Optional[Response]:
+        if self.entry is None:
+            return None
+        return self._json_response(self.entry)
+
+    def store(self, model: BaseModel) -> Response:
+        body = model.model_dump_json(by_alias=True).encode()
+        return self._json_response(response_cache.put(self.key, body, self.ttl_seconds, self.feed))
+
+    def _json_response(self, entry: CachedBody) -> Response:
+        if self.encoding in entry.encoded:
+            response = Response(content=entry.encoded[self.encoding], media_type="application/json")
+            response.headers["Content-Encoding"] = self.encoding
+        else:
+            response = Response(content=entry.body, media_type="application/json")
+        for name, value in self._headers.headers.items():
+            if name not in ("content-length", "content-type"):
+                response.headers[name] = value
+        response.headers["Vary"] = VARY
+        return response
+
+
+def cached_response(ttl_seconds: float) -> Callable[..., CachedResponse]:
+    """
+    Dependency that opts an endpoint into the response cache, with the TTL
+    of its responses. Declare it after static_feed_cache, so a 304 is
+    answered first, and its ETag is sent with cached responses too.
+    """
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+    ) -> CachedResponse:
+        return CachedResponse(
+            canonical_url(request),
+            ttl_seconds,
+            get_feed_repository(db),
+            preferred_encoding(request.headers.get("accept-encoding")),
+            response,
+        )
+
+    return dependency
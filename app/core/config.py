@@ -15,6 +15,44 @@ class Settings(BaseSettings):
     
     GTFS_DATA_DIR: Path = _project_root / "data" / "raw" / "stcp"
     
+    # Apply only the rows that changed since the previous load instead of
+    # clearing and re-inserting every table
+    GTFS_INCREMENTAL_LOAD: bool = False
+    
+    # Store each shape's points in a single packed row (packed_shapes)
+    # instead of one row per point. The API and the populate scripts must
+    # use the same value.
+    GTFS_PACKED_STORAGE: bool = False
+    
+    # max-age of the Cache-Control header of the static feed endpoints, in
+    # seconds. Clients revalidate with the ETag afterwards.
+    STATIC_CACHE_MAX_AGE: int = 300
+    
+    # Memory the in-process response cache may use for serialised responses
+    # (see app.api.utils.response_cache), in bytes
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Cached responses are compressed once and served many times, so these
+    # favour size over speed (level 9 of either still takes ~40 ms on the
+    # 300 KB stop list; brotli's 11 took over half a second)
+    RESPONSE_CACHE_GZIP_LEVEL: int = 9
+    RESPONSE_CACHE_BROTLI_QUALITY: int = 9
+    
+    # Reuse the response models converted from the loaded feed, skip
+    # re-validating trusted service output and render error responses with
+    # orjson (see app.api.utils.json_response)
+    FAST_JSON_RESPONSES: bool = False
+    
+    # Compress JSON and text responses of at least RESPONSE_COMPRESSION_MIN_SIZE
+    # bytes with brotli or gzip, whichever the client prefers. Responses are
+    # compressed on every request, so the levels favour speed; cached
+    # responses are compressed once when stored, at the
+    # RESPONSE_CACHE_* levels above.
+    RESPONSE_COMPRESSION: bool = True
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+    RESPONSE_COMPRESSION_GZIP_LEVEL: int = 6
+    RESPONSE_COMPRESSION_BROTLI_QUALITY: int = 4
+    
     # set the SECRET_KEY under .env
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     
@@ -0,0 +1,44 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import Base, outdated_tables
+from app.data_source.gtfs.stcp.models.feed_version import FeedVersion
+
+
+def current_feed_version(db: Session) -> Optional[FeedVersion]:
+    """
+    The version of the feed the database currently holds, if it was recorded.
+    
+    None when the tables no longer match the models, or when the feed was
+    stored with the other GTFS_PACKED_STORAGE layout, so a schema or layout
+    change always leads to a full load even if the feed itself did not
+    change.
+    """
+    bind = db.get_bind()
+    # Databases populated before feed versions were recorded have no table yet
+    Base.metadata.create_all(bind=bind, tables=[FeedVersion.__table__])
+    if outdated_tables(bind):
+        return None
+    version = db.query(FeedVersion).order_by(FeedVersion.id.desc()).first()
+    if version is None or version.packed_storage != settings.GTFS_PACKED_STORAGE:
+        return None
+    return version
+
+
+def record_feed_version(
+    db: Session,
+    fingerprint: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> FeedVersion:
+    version = FeedVersion(
+        fingerprint=fingerprint,
+        etag=etag,
+        last_modified=last_modified,
+        packed_storage=settings.GTFS_PACKED_STORAGE,
+    )
+    db.add(version)
+    db.flush()
+    return version
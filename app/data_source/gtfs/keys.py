@@ -0,0 +1,60 @@
+from typing import Dict, List, Sequence
+
+from sqlalchemy import Table, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.data_source.gtfs.writer import create_writer
+
+# The largest tables (stop_visits, shapes and packed_shapes) refer to stops,
+# routes, trips and shapes by a dense integer key instead of the string id.
+# The dictionary tables (stop_keys, route_keys, trip_keys, shape_keys) map
+# the ids to their keys; the API still exposes the string ids and
+# translates them through these tables.
+
+
+class KeyDictionary:
+    """
+    Integer keys of the ids of one dictionary table.
+
+    Keys the table already holds are kept, so rows loaded earlier (or by
+    another script) stay valid, and ids seen for the first time get the
+    next free key. write() stores the dictionary back, once every id of the
+    load has been looked up.
+    """
+
+    def __init__(self, db: Session, table: Table):
+        self.db = db
+        self.table = table
+        self._keys: Dict[str, int] = dict(db.execute(select(table.c.id, table.c.key)).all())
+        self._next_key = max(self._keys.values(), default=0) + 1
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def key(self, id: str) -> int:
+        key = self._keys.get(id)
+        if key is None:
+            key = self._keys[id] = self._next_key
+            self._next_key += 1
+        return key
+
+    def keys(self, ids: Sequence[str]) -> List[int]:
+        known = self._keys
+        return [known[id] if id in known else self.key(id) for id in ids]
+
+    def write(self) -> int:
+        writer = create_writer(self.db, self.table, ("key", "id"))
+        writer.clear()
+        written = writer.write((key, id) for id, key in self._keys.items())
+        writer.finish()
+        return written
+
+
+def key_of(model, id: str) -> ColumnElement:
+    """
+    Scalar subquery of the key of id in a dictionary model (e.g. StopKey),
+    to filter a keyed table by a string id in the same statement. It is
+    NULL, so nothing matches, for ids that have no key.
+    """
+    return select(model.key).where(model.id == id).scalar_subquery()
@@ -1,12 +1,36 @@
 import csv
-from pathlib import Path
-from typing import List, Dict, Any, Callable, Optional
+import hashlib
+import io
+import zipfile
+from itertools import islice
+from pathlib import Path, PurePosixPath
+from typing import List, Dict, Any, BinaryIO, Callable, IO, Iterator, Optional, Tuple, Union
 import logging
 
-from app.data_source.gtfs.normalizer import GTFSNormalizer
+from app.core.config import settings
+from app.data_source.gtfs.normalizer import GTFSNormalizer, ShapeColumns, StopTimeColumns
 
 logger = logging.getLogger(__name__)
 
+# Number of rows normalised and handed to the caller at a time by the iter_* methods
+DEFAULT_CHUNK_SIZE = 10000
+
+# A directory of extracted .txt files, a .zip file, or the zip itself as bytes/stream
+FeedSource = Union[Path, str, bytes, BinaryIO]
+
+# Feed the populate steps read from; replaced when the zip is downloaded
+# straight into memory (see --download in populate_stcp.py)
+_feed_source: FeedSource = settings.GTFS_DATA_DIR
+
+
+def set_feed_source(source: FeedSource) -> None:
+    global _feed_source
+    _feed_source = source
+
+
+def get_feed_source() -> FeedSource:
+    return _feed_source
+
 
 class GTFSLoaderError(Exception):
     pass
@@ -17,38 +41,150 @@ class GTFSFileNotFoundError(GTFSLoaderError):
 
 
 class GTFSLoader:
-    def __init__(self, data_dir: Path):
+    def __init__(self, source: FeedSource, chunk_size: int = DEFAULT_CHUNK_SIZE):
 
-        self.data_dir = Path(data_dir)
-        if not self.data_dir.exists():
-            raise GTFSFileNotFoundError(f"GTFS data directory not found: {data_dir}")
+        self.data_dir: Optional[Path] = None
+        self.zip_file: Optional[zipfile.ZipFile] = None
+        
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
         
-        if not self.data_dir.is_dir():
-            raise GTFSLoaderError(f"Path is not a directory: {data_dir}")
+        if hasattr(source, "read"):
+            self.location = "<GTFS zip stream>"
+            self.zip_file = self._open_zip(source)
+        else:
+            path = Path(source)
+            self.location = str(path)
+            if not path.exists():
+                raise GTFSFileNotFoundError(f"GTFS data directory not found: {source}")
+            
+            if path.is_dir():
+                self.data_dir = path
+            elif zipfile.is_zipfile(path):
+                self.zip_file = self._open_zip(path)
+            else:
+                raise GTFSLoaderError(f"Path is not a directory or zip file: {source}")
+        
+        # Zip members by file name, whether or not the feed was zipped inside a folder
+        self._members: Dict[str, str] = {}
+        if self.zip_file is not None:
+            for name in self.zip_file.namelist():
+                if not name.endswith("/"):
+                    self._members.setdefault(PurePosixPath(name).name, name)
         
         self.normalizer = GTFSNormalizer()
+        self.chunk_size = chunk_size
 
-    def _load_csv_file(self, filename: str) -> List[Dict[str, str]]:
-        file_path = self.data_dir / filename
-        
-        if not file_path.exists():
-            raise GTFSFileNotFoundError(f"{filename} not found at {file_path}")
+    def _open_zip(self, source: Union[Path, BinaryIO]) -> zipfile.ZipFile:
+        try:
+            return zipfile.ZipFile(source, "r")
+        except zipfile.BadZipFile as e:
+            raise GTFSLoaderError(f"Invalid GTFS zip file {self.location}: {e}") from e
+
+    def file_location(self, filename: str) -> str:
+        if self.zip_file is not None:
+            return f"{self.location}:{self._members.get(filename, filename)}"
+        return str(self.data_dir / filename)
+
+    def has_file(self, filename: str) -> bool:
+        if self.zip_file is not None:
+            return filename in self._members
+        return (self.data_dir / filename).exists()
+
+    def _open_text(self, filename: str) -> IO[str]:
+        if self.zip_file is not None:
+            # Members are decompressed and decoded as they are read, never extracted
+            return io.TextIOWrapper(self.zip_file.open(self._members[filename]), encoding="utf-8", newline="")
+        return open(self.data_dir / filename, "r", encoding="utf-8")
+
+    def _open_binary(self, filename: str) -> IO[bytes]:
+        if self.zip_file is not None:
+            return self.zip_file.open(self._members[filename])
+        return open(self.data_dir / filename, "rb")
+
+    def file_names(self) -> List[str]:
+        if self.zip_file is not None:
+            names = self._members
+        else:
+            names = [path.name for path in self.data_dir.iterdir() if path.is_file()]
+        return sorted(name for name in names if name.endswith(".txt"))
+
+    def fingerprint(self) -> str:
+        """
+        sha256 over the name and content of every .txt file of the feed.
+
+        Only the file contents count, so the same feed re-zipped with other
+        timestamps (or extracted to a directory) has the same fingerprint.
+        """
+        digest = hashlib.sha256()
+        for filename in self.file_names():
+            digest.update(filename.encode("utf-8") + b"\0")
+            with self._open_binary(filename) as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _iter_csv_file(self, filename: str, reader: Callable = csv.DictReader) -> Iterator[Any]:
+        if not self.has_file(filename):
+            raise GTFSFileNotFoundError(f"{filename} not found at {self.file_location(filename)}")
         
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                rows = [dict(row) for row in reader]
-                
-            logger.debug(f"Loaded {len(rows)} rows from {filename}")
-            return rows
+            with self._open_text(filename) as f:
+                yield from reader(f)
             
         except UnicodeDecodeError as e:
             raise GTFSLoaderError(f"Error decoding {filename}: {e}") from e
         except csv.Error as e:
             raise GTFSLoaderError(f"Error parsing CSV file {filename}: {e}") from e
+        except zipfile.BadZipFile as e:
+            raise GTFSLoaderError(f"Error reading {filename} from zip: {e}") from e
         except IOError as e:
             raise GTFSLoaderError(f"Error reading file {filename}: {e}") from e
 
+    def _load_csv_file(self, filename: str) -> List[Dict[str, str]]:
+        rows = list(self._iter_csv_file(filename))
+        logger.debug(f"Loaded {len(rows)} rows from {filename}")
+        return rows
+
+    def iter_csv_chunks(self, filename: str) -> Iterator[List[Dict[str, str]]]:
+        rows = self._iter_csv_file(filename)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def iter_csv_columns(self, filename: str) -> Iterator[Dict[str, Tuple[str, ...]]]:
+        """
+        Yield chunks of a CSV file as {column: values}, transposed from plain
+        csv.reader rows, for the columnar normalisers.
+        """
+        rows = self._iter_csv_file(filename, csv.reader)
+        header = next(rows, None)
+        if header is None:
+            return
+        
+        width = len(header)
+        line = 1
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            
+            # Blank lines are skipped like csv.DictReader does; a short or long
+            # row would shift every later value in its column
+            complete = [row for row in chunk if row]
+            for offset, row in enumerate(complete):
+                if len(row) != width:
+                    raise GTFSLoaderError(
+                        f"Error parsing CSV file {filename}: expected {width} fields, got {len(row)} near line {line + offset + 1}"
+                    )
+            line += len(chunk)
+            
+            if complete:
+                yield dict(zip(header, zip(*complete)))
+
     def _load_and_normalize(
         self, 
         filename: str, 
@@ -59,6 +195,22 @@ class GTFSLoader:
         logger.info(f"Normalized {len(normalized_data)} records from {filename}")
         return normalized_data
 
+    def _iter_and_normalize(
+        self,
+        filename: str,
+        normalize_func: Callable[[Any], Any],
+        columnar: bool = False,
+    ) -> Iterator[Any]:
+        # Only one chunk of raw and normalised rows is alive at a time, so memory
+        # stays bounded by chunk_size regardless of the feed size
+        raw_chunks = self.iter_csv_columns(filename) if columnar else self.iter_csv_chunks(filename)
+        total = 0
+        for raw_chunk in raw_chunks:
+            normalized_chunk = normalize_func(raw_chunk)
+            total += len(normalized_chunk)
+            yield normalized_chunk
+        logger.info(f"Normalized {total} records from {filename}")
+
     def load_agency(self) -> List[Dict[str, Any]]:
         return self._load_and_normalize("agency.txt", self.normalizer.normalize_agencies)
     
@@ -78,19 +230,55 @@ class GTFSLoader:
     def load_shapes(self) -> List[Dict[str, Any]]:
         return self._load_and_normalize("shapes.txt", self.normalizer.normalize_shapes)
 
+    def load_trips_for_table(self) -> List[Dict[str, Any]]:
+        return self._load_and_normalize("trips.txt", self.normalizer.normalize_trips_for_table)
+
     def load_trip_shapes(self) -> List[Dict[str, Any]]:
         return self._load_and_normalize("trips.txt", self.normalizer.normalize_trip_shapes)
 
     def load_stop_times(self) -> List[Dict[str, Any]]:
         return self._load_and_normalize("stop_times.txt", self.normalizer.normalize_stop_times)
+
+    # Streaming variants: yield normalised rows in chunks of at most chunk_size
+
+    def iter_stops(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("stops.txt", self.normalizer.normalize_stops)
+
+    def iter_calendar(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("calendar.txt", self.normalizer.normalize_calendars)
+
+    def iter_routes(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("routes.txt", self.normalizer.normalize_routes)
+
+    def iter_trips(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("trips.txt", self.normalizer.normalize_trips)
+
+    def iter_trips_for_table(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("trips.txt", self.normalizer.normalize_trips_for_table)
+
+    def iter_shapes(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("shapes.txt", self.normalizer.normalize_shapes)
+
+    def iter_trip_shapes(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("trips.txt", self.normalizer.normalize_trip_shapes)
+
+    def iter_stop_times(self) -> Iterator[List[Dict[str, Any]]]:
+        return self._iter_and_normalize("stop_times.txt", self.normalizer.normalize_stop_times)
+
+    # Columnar variants for the large files: one array per column and chunk
+    
+    def iter_shape_columns(self) -> Iterator[ShapeColumns]:
+        return self._iter_and_normalize("shapes.txt", self.normalizer.normalize_shape_columns, columnar=True)
+
+    def iter_stop_time_columns(self) -> Iterator[StopTimeColumns]:
+        return self._iter_and_normalize("stop_times.txt", self.normalizer.normalize_stop_time_columns, columnar=True)
     
     def validate_gtfs_files(self) -> bool:
         required_files = ["agency.txt", "calendar.txt", "routes.txt", "shapes.txt", "stop_times.txt", "stops.txt", "trips.txt"]
         missing_files = []
         
         for filename in required_files:
-            file_path = self.data_dir / filename
-            if not file_path.exists():
+            if not self.has_file(filename):
                 missing_files.append(filename)
         
         if missing_files:
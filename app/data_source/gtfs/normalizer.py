@@ -1,6 +1,61 @@
 import json
+from array import array
+from dataclasses import dataclass
 from datetime import datetime, time, timedelta
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Mapping, Sequence
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@lru_cache(maxsize=None)
+def parse_gtfs_seconds(time_str: str) -> int:
+    """
+    Seconds since the start of the service day for a GTFS "H:MM:SS" time.
+
+    GTFS allows times past 24:00:00 for trips that end after midnight, so the
+    result can be larger than a day. A feed only has a few thousand distinct
+    times, so the parsed values are cached.
+    """
+    parts = time_str.strip().split(":")
+    hours = int(parts[0])
+    minutes = int(parts[1])
+    seconds = int(parts[2]) if len(parts) > 2 else 0
+    if not (0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError(f"Invalid GTFS time: {time_str}")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+@lru_cache(maxsize=None)
+def time_of_day(seconds: int) -> time:
+    # Times past midnight wrap to the 0-23 hour range
+    seconds %= SECONDS_PER_DAY
+    return time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+@dataclass
+class StopTimeColumns:
+    """A chunk of stop_times.txt as one buffer per column."""
+    trip_id: List[str]
+    stop_id: List[str]
+    stop_sequence: array  # int32
+    arrival_time: array  # int32 seconds since the start of the service day
+    departure_time: array  # int32 seconds since the start of the service day
+
+    def __len__(self) -> int:
+        return len(self.trip_id)
+
+
+@dataclass
+class ShapeColumns:
+    """A chunk of shapes.txt as one buffer per column."""
+    id: List[str]
+    lat: array  # float64
+    lon: array  # float64
+    sequence: array  # int32
+
+    def __len__(self) -> int:
+        return len(self.id)
 
 
 class GTFSNormalizer:
@@ -186,6 +241,15 @@ class GTFSNormalizer:
     def normalize_shapes(gtfs_shapes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         return [GTFSNormalizer.normalize_shape(shape) for shape in gtfs_shapes]
 
+    @staticmethod
+    def normalize_shape_columns(columns: Mapping[str, Sequence[str]]) -> ShapeColumns:
+        return ShapeColumns(
+            id=list(map(str.strip, columns["shape_id"])),
+            lat=array("d", map(float, columns["shape_pt_lat"])),
+            lon=array("d", map(float, columns["shape_pt_lon"])),
+            sequence=array("i", map(int, columns["shape_pt_sequence"])),
+        )
+
     @staticmethod
     def normalize_trip_shape(gtfs_trip: Dict[str, Any]) -> Dict[str, Any]:
         trip_id = gtfs_trip.get("trip_id").strip()
@@ -207,6 +271,10 @@ class GTFSNormalizer:
 
 
 
+    @staticmethod
+    def parse_gtfs_time(time_str: str) -> time:
+        return time_of_day(parse_gtfs_seconds(time_str))
+
     @staticmethod
     def normalize_stop_time(gtfs_stop_time: Dict[str, Any]) -> Dict[str, Any]:
         trip_id = gtfs_stop_time.get("trip_id").strip()
@@ -231,19 +299,8 @@ class GTFSNormalizer:
         arrival_time_str = gtfs_stop_time.get("arrival_time").strip()
         departure_time_str = gtfs_stop_time.get("departure_time").strip()
         
-        def parse_gtfs_time(time_str: str) -> time:
-            parts = time_str.split(":")
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            seconds = int(parts[2]) if len(parts) > 2 else 0
-            
-            # Normalize hours to 0-23 range
-            hours = hours % 24
-            
-            return time(hours, minutes, seconds)
-        
-        arrival_time = parse_gtfs_time(arrival_time_str)
-        departure_time = parse_gtfs_time(departure_time_str)
+        arrival_time = GTFSNormalizer.parse_gtfs_time(arrival_time_str)
+        departure_time = GTFSNormalizer.parse_gtfs_time(departure_time_str)
         
         return {
             "trip_id": trip_id,
@@ -259,4 +316,26 @@ class GTFSNormalizer:
 
     @staticmethod
     def normalize_stop_times(gtfs_stop_times: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        return [GTFSNormalizer.normalize_stop_time(stop_time) for stop_time in gtfs_stop_times]
\ No newline at end of file
+        return [GTFSNormalizer.normalize_stop_time(stop_time) for stop_time in gtfs_stop_times]
+
+    @staticmethod
+    def normalize_stop_time_columns(columns: Mapping[str, Sequence[str]]) -> StopTimeColumns:
+        """
+        Columnar normalize_stop_times: whole columns are parsed at once into
+        arrays instead of building a dict per row. Times are kept as seconds
+        (see time_of_day for the database value).
+        """
+        trip_ids = list(map(str.strip, columns["trip_id"]))
+        
+        # trip_id format: route_id + _ + direction_id + _ + service_id + _ + trip_number
+        for trip_id in set(trip_ids):
+            if trip_id.count("_") < 3:
+                raise ValueError(f"Invalid trip_id format: {trip_id}")
+        
+        return StopTimeColumns(
+            trip_id=trip_ids,
+            stop_id=list(map(str.strip, columns["stop_id"])),
+            stop_sequence=array("i", map(int, columns["stop_sequence"])),
+            arrival_time=array("i", map(parse_gtfs_seconds, columns["arrival_time"])),
+            departure_time=array("i", map(parse_gtfs_seconds, columns["departure_time"])),
+        )
@@ -0,0 +1,47 @@
+import struct
+from array import array
+from typing import Dict, Iterator, Sequence, Tuple
+
+from app.data_source.gtfs.normalizer import ShapeColumns
+
+# Packed storage layout (see GTFS_PACKED_STORAGE): one row per shape instead
+# of one row per shape point. Values are little-endian so the blobs read the
+# same on every platform.
+
+# shape_pt_sequence, lat, lon
+SHAPE_POINT = struct.Struct("<idd")
+
+
+def unpack_shape_points(data: bytes) -> Iterator[Tuple[int, float, float]]:
+    """(sequence, lat, lon) of every point of a packed shape."""
+    return SHAPE_POINT.iter_unpack(data)
+
+
+class ShapePointsPacker:
+    """Collects shape points by shape and packs each shape into a single row."""
+
+    def __init__(self):
+        # shape key -> (sequences, lats, lons)
+        self._shapes: Dict[int, Tuple[array, array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def add(self, shapes: ShapeColumns, shape_keys: Sequence[int]) -> None:
+        """Add a chunk of shape points, given the keys of its id column."""
+        collected = self._shapes
+        for shape_key, sequence, lat, lon in zip(shape_keys, shapes.sequence, shapes.lat, shapes.lon):
+            shape = collected.get(shape_key)
+            if shape is None:
+                shape = collected[shape_key] = (array("i"), array("d"), array("d"))
+            shape[0].append(sequence)
+            shape[1].append(lat)
+            shape[2].append(lon)
+
+    def rows(self) -> Iterator[Tuple[int, bytes]]:
+        """(shape key, points) per shape, points in sequence order."""
+        for shape_key, (sequences, lats, lons) in self._shapes.items():
+            order = sorted(range(len(sequences)), key=sequences.__getitem__)
+            yield shape_key, b"".join(
+                SHAPE_POINT.pack(sequences[index], lats[index], lons[index]) for index in order
+            )
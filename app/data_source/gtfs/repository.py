@@ -0,0 +1,204 @@
+import threading
+from collections import defaultdict
+from datetime import datetime
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine, Row
+from sqlalchemy.orm import Session
+
+from app.core.database import db_file
+from app.data_source.gtfs.timetable import StopTimetable, load_stop_timetables
+from app.data_source.gtfs.stcp.models.feed_version import FeedVersion
+from app.data_source.gtfs.stcp.models.route import Route
+from app.data_source.gtfs.stcp.models.route_direction import RouteDirection
+from app.data_source.gtfs.stcp.models.service_day import ServiceDay
+from app.data_source.gtfs.stcp.models.stop import Stop
+from app.data_source.gtfs.stcp.models.trip import Trip
+
+# How often the API looks for a feed reloaded on PostgreSQL. On SQLite a
+# reload replaces the database file, which refresh_engine() already notices
+# without a query.
+VERSION_CHECK_SECONDS = 60
+
+
+class FeedRepository:
+    """
+    Read-only, in-memory copy of the small static GTFS tables (stops, routes,
+    route directions, trips and service days) with the indexes the services
+    look them up by.
+
+    The rows are the database rows as loaded, kept in the order the tables
+    return them, so lists and pages come out in the same order as the
+    queries they replace. A repository is never modified, apart from the
+    stop timetables and response schemas it keeps once they are first
+    built; a reload builds a new one (see get_feed_repository), so they
+    are dropped along with the feed they came from.
+    """
+
+    def __init__(
+        self,
+        stops: List[Row],
+        routes: List[Row],
+        route_directions: List[Row],
+        trips: List[Row],
+        service_days: List[Row],
+        version_id: Optional[int] = None,
+        fingerprint: Optional[str] = None,
+        loaded_at: Optional[datetime] = None,
+    ):
+        # The feed_versions row of the load the tables come from. A full load
+        # builds a fresh database, so its id starts again at 1: loaded_at is
+        # what tells two loads apart.
+        self.version_id = version_id
+        self.fingerprint = fingerprint
+        self.loaded_at = loaded_at
+
+        self.stops = stops
+        self.stops_by_id: Dict[str, Row] = {stop.id: stop for stop in stops}
+        self.stops_by_zone: Dict[str, List[Row]] = defaultdict(list)
+        for stop in stops:
+            self.stops_by_zone[stop.zone_id].append(stop)
+
+        self.routes = routes
+        self.routes_by_id: Dict[str, Row] = {route.id: route for route in routes}
+
+        # Ordered by direction_id and service_id within a route
+        self.route_directions: Dict[str, List[Row]] = defaultdict(list)
+        self.route_service_ids: Dict[str, List[str]] = defaultdict(list)
+        self.routes_by_service: Dict[str, Set[str]] = defaultdict(set)
+        for direction in route_directions:
+            self.route_directions[direction.route_id].append(direction)
+            if direction.service_id not in self.route_service_ids[direction.route_id]:
+                self.route_service_ids[direction.route_id].append(direction.service_id)
+            self.routes_by_service[direction.service_id].add(direction.route_id)
+
+        self.trips = trips
+        self.trips_by_id: Dict[str, Row] = {trip.trip_id: trip for trip in trips}
+        self.trip_positions: Dict[str, int] = {trip.trip_id: position for position, trip in enumerate(trips)}
+        self.trips_by_route: Dict[str, List[Row]] = defaultdict(list)
+        self.trips_by_route_direction_service: Dict[Tuple[str, int, str], List[Row]] = defaultdict(list)
+        for trip in trips:
+            self.trips_by_route[trip.route_id].append(trip)
+            self.trips_by_route_direction_service[(trip.route_id, trip.direction_id, trip.service_id)].append(trip)
+
+        self.service_days = service_days
+        self.service_days_by_id: Dict[str, Row] = {service_day.service_id: service_day for service_day in service_days}
+        self.service_days_by_type: Dict[int, Row] = {}
+        for service_day in service_days:
+            self.service_days_by_type.setdefault(service_day.service_type, service_day)
+
+        self._stop_timetables: Dict[str, Dict[str, StopTimetable]] = {}
+        self._stop_schemas: Optional[Dict[str, Any]] = None
+        self._bus_trips_and_routes: Dict[Tuple[str, Optional[int], Optional[str]], Tuple[Any, Any]] = {}
+
+    def stop_timetables(self, db: Session, stop_id: str) -> Dict[str, StopTimetable]:
+        """
+        Timetables of a stop by service_id. They are read from stop_visits the
+        first time the stop is asked for and kept: loading every stop up front
+        would hold up startup and every reload for seconds.
+        """
+        timetables = self._stop_timetables.get(stop_id)
+        if timetables is None:
+            timetables = self._stop_timetables[stop_id] = load_stop_timetables(db, stop_id, self.trip_positions)
+        return timetables
+
+    def stop_schemas(self, convert: Callable[[Row], Any]) -> Dict[str, Any]:
+        """
+        Every stop converted by convert, by id in the order of stops. They
+        are converted the first time they are asked for and shared by every
+        response until the next reload.
+        """
+        if self._stop_schemas is None:
+            self._stop_schemas = {stop.id: convert(stop) for stop in self.stops}
+        return self._stop_schemas
+
+    def bus_trip_and_route(
+        self,
+        key: Tuple[Optional[str], Optional[int], Optional[str]],
+        find: Callable[[], Tuple[Any, Any]],
+    ) -> Tuple[Any, Any]:
+        """
+        The trip and route find returns for a bus's (route_id, direction_id,
+        service_id), kept once found. Buses that match nothing in the feed
+        are looked up again every time, so the vehicle feed cannot grow the
+        cache beyond the feed's own routes.
+        """
+        trip_and_route = self._bus_trips_and_routes.get(key)
+        if trip_and_route is None:
+            trip_and_route = find()
+            if trip_and_route != (None, None):
+                self._bus_trips_and_routes[key] = trip_and_route
+        return trip_and_route
+
+    @property
+    def version(self) -> Optional[str]:
+        """
+        Identifier of the loaded feed, different after every load (a forced
+        reload of the same feed included). None for a database populated
+        before feed versions were recorded.
+        """
+        if self.version_id is None:
+            return None
+        return f"{self.version_id}-{self.loaded_at.isoformat()}-{self.fingerprint}"
+
+    @classmethod
+    def load(cls, db: Session) -> "FeedRepository":
+        version = db.execute(
+            select(FeedVersion.id, FeedVersion.fingerprint, FeedVersion.loaded_at).order_by(FeedVersion.id.desc()).limit(1)
+        ).first()
+        return cls(
+            stops=db.execute(select(Stop.__table__)).all(),
+            routes=db.execute(select(Route.__table__)).all(),
+            route_directions=db.execute(
+                select(RouteDirection.__table__).order_by(
+                    RouteDirection.route_id, RouteDirection.direction_id, RouteDirection.service_id
+                )
+            ).all(),
+            trips=db.execute(select(Trip.__table__)).all(),
+            service_days=db.execute(select(ServiceDay.__table__)).all(),
+            version_id=version.id if version else None,
+            fingerprint=version.fingerprint if version else None,
+            loaded_at=version.loaded_at if version else None,
+        )
+
+
+def _latest_version(db: Session) -> Tuple[Optional[int], Optional[datetime]]:
+    version = db.execute(
+        select(FeedVersion.id, FeedVersion.loaded_at).order_by(FeedVersion.id.desc()).limit(1)
+    ).first()
+    return (version.id, version.loaded_at) if version else (None, None)
+
+
+_lock = threading.Lock()
+_repository: Optional[FeedRepository] = None
+_loaded_from: Optional[Engine] = None
+_checked_at = 0.0
+
+
+def _version_changed(db: Session, repository: FeedRepository) -> bool:
+    global _checked_at
+    if db_file is not None or monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+        return False
+    _checked_at = monotonic()
+    return _latest_version(db) != (repository.version_id, repository.loaded_at)
+
+
+def get_feed_repository(db: Session) -> FeedRepository:
+    """
+    The repository of the feed db is bound to, loaded on first use and again
+    once a reload has swapped in a new feed. In between, lookups do not
+    touch the database.
+    """
+    global _repository, _loaded_from, _checked_at
+    repository = _repository
+    if repository is not None and _loaded_from is db.get_bind() and not _version_changed(db, repository):
+        return repository
+    with _lock:
+        # Another request may have reloaded it while this one waited
+        if _repository is repository:
+            _repository = FeedRepository.load(db)
+            _loaded_from = db.get_bind()
+            _checked_at = monotonic()
+        return _repository
@@ -0,0 +1,193 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.database import get_engine, use_database
+from app.data_source.gtfs.loader import FeedSource, get_feed_source, set_feed_source
+from app.data_source.gtfs.writer import is_incremental, set_incremental, set_write_lock
+
+
+class StepSchedulerError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    func: Callable[[], None]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class StepTiming:
+    name: str
+    start: float
+    end: float
+    depends_on: Tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def _init_worker(
+    lock,
+    incremental: bool,
+    feed_source: FeedSource,
+    database_url: Optional[str],
+    database_schema: Optional[str],
+    bulk_load: bool,
+) -> None:
+    # Connections inherited from the parent process must not be reused here
+    get_engine().dispose(close=False)
+    if database_url is not None:
+        use_database(database_url, database_schema, bulk_load)
+    set_write_lock(lock)
+    set_incremental(incremental)
+    set_feed_source(feed_source)
+
+
+def _run_step(func: Callable[[], None]) -> Tuple[float, float]:
+    start = time.time()
+    func()
+    return start, time.time()
+
+
+class StepScheduler:
+    """
+    Runs populate steps declared as a DAG.
+
+    Every step whose dependencies have finished is submitted to a process
+    pool, so independent files are parsed concurrently. Database writes
+    from the workers are serialised through a shared lock (see
+    BulkWriter), which keeps SQLite to a single writer at a time.
+
+    Workers write to database_url (and database_schema) when given, e.g. a
+    staging database, and to the configured database otherwise. bulk_load
+    opens that database in bulk load mode (see create_db_engine).
+    """
+
+    def __init__(
+        self,
+        steps: Sequence[Step],
+        max_workers: Optional[int] = None,
+        database_url: Optional[str] = None,
+        database_schema: Optional[str] = None,
+        bulk_load: bool = False,
+    ):
+        self.steps: Dict[str, Step] = {step.name: step for step in steps}
+        if len(self.steps) != len(steps):
+            raise StepSchedulerError("Step names must be unique")
+
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise StepSchedulerError(f"Step {step.name} depends on unknown step {dependency}")
+
+        self.order = self._topological_order()
+        self.max_workers = max_workers or min(len(steps), multiprocessing.cpu_count())
+        self.database_url = database_url
+        self.database_schema = database_schema
+        self.bulk_load = bulk_load
+        self.timings: Dict[str, StepTiming] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def _topological_order(self) -> List[str]:
+        order = []
+        visiting = set()
+        visited = set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise StepSchedulerError(f"Dependency cycle through step {name}")
+            visiting.add(name)
+            for dependency in self.steps[name].depends_on:
+                visit(dependency)
+            visiting.remove(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.steps:
+            visit(name)
+        return order
+
+    def run(self) -> Dict[str, StepTiming]:
+        lock = multiprocessing.Lock()
+        pending = list(self.order)
+        running: Dict[Future, str] = {}
+
+        self.started_at = time.time()
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(lock, is_incremental(), get_feed_source(), self.database_url, self.database_schema, self.bulk_load),
+        ) as executor:
+            while pending or running:
+                for name in list(pending):
+                    step = self.steps[name]
+                    if all(dependency in self.timings for dependency in step.depends_on):
+                        pending.remove(name)
+                        running[executor.submit(_run_step, step.func)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        start, end = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    self.timings[name] = StepTiming(name, start, end, self.steps[name].depends_on)
+
+        self.finished_at = time.time()
+        return self.timings
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """
+        Longest chain of dependent steps by duration: the lower bound on wall
+        time no matter how many workers are available.
+        """
+        path_length: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+
+        for name in self.order:
+            timing = self.timings[name]
+            slowest = max(timing.depends_on, key=lambda d: path_length[d], default=None)
+            previous[name] = slowest
+            path_length[name] = timing.duration + (path_length[slowest] if slowest else 0.0)
+
+        if not path_length:
+            return [], 0.0
+
+        name = max(path_length, key=path_length.get)
+        total = path_length[name]
+        path = []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return list(reversed(path)), total
+
+    def report(self) -> str:
+        wall = (self.finished_at or time.time()) - (self.started_at or time.time())
+        path, path_total = self.critical_path()
+
+        lines = [f"{'Step':<16}{'Start':>10}{'Duration':>10}{'End':>10}"]
+        for timing in sorted(self.timings.values(), key=lambda t: t.start):
+            marker = " *" if timing.name in path else ""
+            lines.append(
+                f"{timing.name:<16}"
+                f"{timing.start - self.started_at:>9.2f}s"
+                f"{timing.duration:>9.2f}s"
+                f"{timing.end - self.started_at:>9.2f}s"
+                f"{marker}"
+            )
+        lines.append("")
+        lines.append(f"Critical path (*): {' -> '.join(path)} = {path_total:.2f}s")
+        lines.append(f"Wall time: {wall:.2f}s with {self.max_workers} worker(s)")
+        return "\n".join(lines)
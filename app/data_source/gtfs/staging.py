@@ -0,0 +1,251 @@
+import os
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, text
+
+from app.core.config import settings
+from app.core.database import Base, get_engine, outdated_tables, sqlite_path, use_database
+from app.data_source.gtfs.stcp.models.bus import Bus
+from app.data_source.gtfs.stcp.models.feed_row_hash import FeedRowHash
+
+# Tables that are not part of the feed; their live rows are copied into the
+# staging database right before it is promoted
+CARRIED_OVER_TABLES = (Bus.__table__,)
+
+# Tables that earlier versions of the models created. A copy of an older live
+# database still has them, so they are dropped before an incremental load
+RETIRED_TABLES = ("trip_stops", "scheduled_arrivals", "packed_trip_stops")
+
+# PostgreSQL schemas used while building a new feed and for the one it replaced
+STAGING_SCHEMA = "gtfs_staging"
+PREVIOUS_SCHEMA = "gtfs_previous"
+
+
+class StagingDatabaseError(Exception):
+    pass
+
+
+class StagingDatabase:
+    """
+    Blue/green target for a full populate run.
+
+    The feed is loaded into a separate database next to the live one (a
+    sibling file on SQLite, a separate schema on PostgreSQL) while the API
+    keeps serving the live data. promote() then swaps it in atomically:
+
+    - SQLite: the staging file is renamed over the live file. Open
+      connections keep reading the file they opened, and the API switches
+      to the new file on its next request (see refresh_engine).
+    - PostgreSQL: in a single transaction, the live feed tables are moved
+      to the gtfs_previous schema and the staging tables into the live
+      schema, so new queries resolve to the new tables. Only the tables of
+      the models move; the live schema itself, with its grants and anything
+      else in it, stays in place. The previous tables are kept until the
+      next promote.
+    """
+
+    def __init__(self, database_url: str = settings.DATABASE_URL):
+        self.live_url = database_url
+        self.live_path = sqlite_path(database_url)
+
+        if self.live_path is not None:
+            self.path: Optional[Path] = self.live_path.with_name(self.live_path.name + ".staging")
+            self.url = f"sqlite:///{self.path}"
+            self.schema: Optional[str] = None
+        else:
+            self.path = None
+            self.url = database_url
+            self.schema = STAGING_SCHEMA
+
+    def prepare(self, copy_live: bool = False) -> None:
+        """
+        Create an empty staging database and bind SessionLocal to it in
+        bulk load mode (see create_db_engine).
+
+        With copy_live the staging database starts as a copy of the live
+        data, so an incremental load only has to apply the changes.
+        """
+        if self.path is None:
+            self._create_schema(copy_live)
+            use_database(self.url, self.schema, bulk_load=True)
+            return
+
+        self._remove_staging_files()
+        if copy_live and self.live_path.exists():
+            self._copy_sqlite()
+        use_database(self.url, self.schema, bulk_load=True)
+        if copy_live:
+            self._drop_outdated_tables()
+        Base.metadata.create_all(bind=get_engine())
+
+    def _drop_outdated_tables(self) -> None:
+        # A copied table whose layout changed since the live data was loaded is
+        # dropped along with its row hashes, so the incremental load rebuilds it
+        engine = get_engine()
+        outdated = [Base.metadata.tables[name] for name in outdated_tables(engine)]
+        preparer = engine.dialect.identifier_preparer
+        with engine.begin() as connection:
+            for table in outdated:
+                table.drop(connection, checkfirst=True)
+            for name in RETIRED_TABLES:
+                connection.execute(text(f"DROP TABLE IF EXISTS {preparer.quote(name)}"))
+            if FeedRowHash.__table__ not in outdated:
+                FeedRowHash.__table__.create(connection, checkfirst=True)
+                connection.execute(
+                    delete(FeedRowHash.__table__).where(
+                        FeedRowHash.table_name.in_([table.name for table in outdated] + list(RETIRED_TABLES))
+                    )
+                )
+
+    def promote(self) -> None:
+        staging_engine = get_engine()
+        use_database(self.live_url)
+        staging_engine.dispose()
+
+        if self.path is not None:
+            self._promote_sqlite()
+        else:
+            self._promote_schema()
+
+    def discard(self) -> None:
+        """Drop the staging database after a failed run; the live data is untouched."""
+        staging_engine = get_engine()
+        use_database(self.live_url)
+        staging_engine.dispose()
+
+        if self.path is not None:
+            self._remove_staging_files()
+        else:
+            with get_engine().begin() as connection:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE"))
+
+    def _remove_staging_files(self) -> None:
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+
+    def _copy_sqlite(self) -> None:
+        # The backup API takes a consistent snapshot without blocking readers
+        source = sqlite3.connect(self.live_path)
+        target = sqlite3.connect(self.path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    def _promote_sqlite(self) -> None:
+        # The renamed file is opened with whatever -wal/-journal files sit next
+        # to the live path, so the staging file must not rely on its own
+        check = sqlite3.connect(self.path)
+        try:
+            journal_mode = check.execute("PRAGMA journal_mode=DELETE").fetchone()[0]
+        finally:
+            check.close()
+        if journal_mode.lower() != "delete":
+            raise StagingDatabaseError(f"Cannot promote {self.path} in journal mode {journal_mode}")
+
+        # The load ran with synchronous=OFF, so flush the file before it replaces the live one
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        # Hold the live write lock across the copy and the rename so no writer
+        # is halfway through a transaction on the old file; readers are not blocked
+        live = sqlite3.connect(self.live_path, timeout=30)
+        try:
+            live.execute("BEGIN IMMEDIATE")
+            self._carry_over_sqlite()
+            os.replace(self.path, self.live_path)
+        finally:
+            live.rollback()
+            live.close()
+
+    def _carry_over_sqlite(self) -> None:
+        staging = sqlite3.connect(self.path)
+        try:
+            staging.execute("ATTACH DATABASE ? AS live", (str(self.live_path),))
+            for table in CARRIED_OVER_TABLES:
+                exists = staging.execute(
+                    "SELECT 1 FROM live.sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+                ).fetchone()
+                if exists is None:
+                    continue
+                columns = ", ".join(column.name for column in table.columns)
+                staging.execute(f"DELETE FROM main.{table.name}")
+                staging.execute(f"INSERT INTO main.{table.name} ({columns}) SELECT {columns} FROM live.{table.name}")
+            staging.commit()
+            staging.execute("DETACH DATABASE live")
+        finally:
+            staging.close()
+
+    def _create_schema(self, copy_live: bool) -> None:
+        # The staging tables are created from the models and filled with
+        # INSERT ... SELECT. Copying them with LIKE ... INCLUDING ALL would keep
+        # id defaults that use the live tables' sequences, which are dropped
+        # along with those tables on the next promote
+        engine = get_engine()
+        outdated = outdated_tables(engine) if copy_live else []
+        with engine.begin() as connection:
+            live_schema = connection.execute(text("SELECT current_schema()")).scalar()
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {STAGING_SCHEMA}"))
+            Base.metadata.create_all(
+                bind=connection.execution_options(schema_translate_map={None: STAGING_SCHEMA})
+            )
+            if not copy_live:
+                return
+
+            # Like _drop_outdated_tables: a table whose layout changed since the
+            # live data was loaded starts empty and loses its row hashes
+            for table in Base.metadata.sorted_tables:
+                if table.name in outdated:
+                    continue
+                columns = ", ".join(column.name for column in table.columns)
+                connection.execute(text(
+                    f"INSERT INTO {STAGING_SCHEMA}.{table.name} ({columns}) "
+                    f"SELECT {columns} FROM {live_schema}.{table.name}"
+                ))
+                # Rows keep their ids, so the new sequence continues after them
+                id_column = table.autoincrement_column
+                if id_column is not None:
+                    connection.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence(:table, :column), max({id_column.name})) "
+                        f"FROM {STAGING_SCHEMA}.{table.name} HAVING max({id_column.name}) IS NOT NULL"
+                    ), {"table": f"{STAGING_SCHEMA}.{table.name}", "column": id_column.name})
+            if FeedRowHash.__table__.name not in outdated:
+                connection.execute(
+                    text(f"DELETE FROM {STAGING_SCHEMA}.{FeedRowHash.__table__.name} WHERE table_name = ANY(:names)"),
+                    {"names": outdated + list(RETIRED_TABLES)},
+                )
+
+    def _promote_schema(self) -> None:
+        with get_engine().begin() as connection:
+            live_schema = connection.execute(text("SELECT current_schema()")).scalar()
+            for table in CARRIED_OVER_TABLES:
+                exists = connection.execute(
+                    text("SELECT to_regclass(:name)"), {"name": f"{live_schema}.{table.name}"}
+                ).scalar()
+                if exists is None:
+                    continue
+                columns = ", ".join(column.name for column in table.columns)
+                connection.execute(text(f"LOCK TABLE {live_schema}.{table.name} IN EXCLUSIVE MODE"))
+                connection.execute(text(f"DELETE FROM {STAGING_SCHEMA}.{table.name}"))
+                connection.execute(text(
+                    f"INSERT INTO {STAGING_SCHEMA}.{table.name} ({columns}) "
+                    f"SELECT {columns} FROM {live_schema}.{table.name}"
+                ))
+
+            # Tables are swapped one by one; renaming the live schema would move
+            # its grants and extensions (and anything else in it) along with the
+            # feed. SET SCHEMA takes a table's indexes and owned sequences with it
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {PREVIOUS_SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {PREVIOUS_SCHEMA}"))
+            for name in [table.name for table in Base.metadata.sorted_tables] + list(RETIRED_TABLES):
+                connection.execute(text(f"ALTER TABLE IF EXISTS {live_schema}.{name} SET SCHEMA {PREVIOUS_SCHEMA}"))
+            for table in Base.metadata.sorted_tables:
+                connection.execute(text(f"ALTER TABLE {STAGING_SCHEMA}.{table.name} SET SCHEMA {live_schema}"))
+            connection.execute(text(f"DROP SCHEMA {STAGING_SCHEMA} CASCADE"))
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String
+from app.core.database import Base
+
+
+class FeedRowHash(Base):
+    __tablename__ = "feed_row_hashes"
+    
+    # Hash of every row written by the previous load, keyed by the row's primary key
+    # (JSON-encoded), so an incremental reload only touches rows that changed
+    table_name = Column(String, primary_key=True)
+    row_key = Column(String, primary_key=True)
+    row_hash = Column(String, nullable=False)
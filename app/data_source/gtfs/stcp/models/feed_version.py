@@ -0,0 +1,16 @@
+from sqlalchemy import Boolean, Column, String, DateTime, Integer
+from datetime import datetime
+from app.core.database import Base
+
+
+class FeedVersion(Base):
+    __tablename__ = "feed_versions"
+    
+    # One row per populated feed; the row with the highest id is the one being served
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    fingerprint = Column(String, nullable=False, index=True)  # sha256 of the feed's .txt files
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    loaded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # GTFS_PACKED_STORAGE of the load: the API only reads the shape table it selects
+    packed_storage = Column(Boolean, nullable=False, default=False)
\ No newline at end of file
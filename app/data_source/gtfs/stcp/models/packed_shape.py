@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, LargeBinary
+from app.core.database import Base
+
+
+class PackedShape(Base):
+    __tablename__ = "packed_shapes"
+    
+    # One row per shape replacing its shapes rows when GTFS_PACKED_STORAGE is set
+    # (see app.data_source.gtfs.packed for the layout)
+    shape_key = Column(Integer, primary_key=True)  # key in shape_keys
+    points = Column(LargeBinary, nullable=False)  # sequence, lat and lon per point
\ No newline at end of file
@@ -5,7 +5,7 @@ from app.core.database import Base
 class Route(Base):
     __tablename__ = "routes"
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True)
     short_name = Column(String, nullable=False)
     long_name = Column(String, nullable=False)
     type = Column(Integer, nullable=False)
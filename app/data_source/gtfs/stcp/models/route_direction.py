@@ -5,7 +5,7 @@ from app.core.database import Base
 class RouteDirection(Base):
     __tablename__ = "route_directions"
     
-    route_id = Column(String, primary_key=True, index=True)
-    direction_id = Column(Integer, primary_key=True, index=True)
-    service_id = Column(String, primary_key=True, index=True)
+    route_id = Column(String, primary_key=True)
+    direction_id = Column(Integer, primary_key=True)
+    service_id = Column(String, primary_key=True)
     headsign = Column(String, nullable=False)
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Integer
+from app.core.database import Base
+
+
+class RouteKey(Base):
+    __tablename__ = "route_keys"
+    
+    # Dense integer key standing in for the route id in the large tables
+    # (see app.data_source.gtfs.keys)
+    key = Column(Integer, primary_key=True)
+    id = Column(String, nullable=False, unique=True, index=True)
\ No newline at end of file
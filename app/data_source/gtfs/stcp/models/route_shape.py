@@ -5,6 +5,6 @@ from app.core.database import Base
 class RouteShape(Base):
     __tablename__ = "route_shapes"
     
-    route_id = Column(String, primary_key=True, index=True)
-    direction_id = Column(Integer, primary_key=True, index=True)
-    shape_id = Column(String, nullable=False, index=True)
\ No newline at end of file
+    route_id = Column(String, primary_key=True)
+    direction_id = Column(Integer, primary_key=True)
+    shape_id = Column(String, nullable=False)
\ No newline at end of file
@@ -5,7 +5,7 @@ from app.core.database import Base
 class RouteStop(Base):
     __tablename__ = "route_stops"
     
-    route_id = Column(String, primary_key=True, index=True)
-    direction_id = Column(Integer, primary_key=True, index=True)
-    stop_id = Column(String, primary_key=True, index=True)
-    stop_sequence = Column(Integer, nullable=False, index=True)
\ No newline at end of file
+    route_id = Column(String, primary_key=True)
+    direction_id = Column(Integer, primary_key=True)
+    stop_id = Column(String, primary_key=True)
+    stop_sequence = Column(Integer, nullable=False)
\ No newline at end of file
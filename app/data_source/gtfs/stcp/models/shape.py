@@ -1,11 +1,12 @@
-from sqlalchemy import Column, String, Float, Integer
+from sqlalchemy import Column, Float, Integer
 from app.core.database import Base
 
 
 class Shape(Base):
     __tablename__ = "shapes"
     
-    id = Column(String, primary_key=True, index=True)
-    sequence = Column(Integer, primary_key=True, index=True)
+    # Key in shape_keys (see app.data_source.gtfs.keys)
+    shape_key = Column(Integer, primary_key=True)
+    sequence = Column(Integer, primary_key=True)
     lat = Column(Float, nullable=False)
     lon = Column(Float, nullable=False)
\ No newline at end of file
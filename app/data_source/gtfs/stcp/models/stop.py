@@ -5,8 +5,8 @@ from app.core.database import Base
 class Stop(Base):    
     __tablename__ = "stops"
     
-    id = Column(String, primary_key=True, index=True)
-    name = Column(String, nullable=False, index=True)
+    id = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
     lat = Column(Float, nullable=False)
     lon = Column(Float, nullable=False)
-    zone_id = Column(String, nullable=False)
\ No newline at end of file
+    zone_id = Column(String, nullable=False, index=True)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Integer, Time, Index
+from app.core.database import Base
+
+
+class StopVisit(Base):
+    __tablename__ = "stop_visits"
+    __table_args__ = (
+        # Arrivals of a stop are read by service and time range (see StopService)
+        Index("ix_stop_visits_stop_service_seconds", "stop_key", "service_id", "arrival_seconds"),
+        # All arrivals of a stop in arrival order (all=true)
+        Index("ix_stop_visits_stop_seconds", "stop_key", "arrival_seconds"),
+    )
+    
+    # One row per stop_times.txt row. The primary key serves the stops of a
+    # trip in sequence order (see TripService), the indexes the scheduled
+    # arrivals of a stop.
+    # Trips, stops and routes are referred to by their keys in trip_keys,
+    # stop_keys and route_keys (see app.data_source.gtfs.keys)
+    trip_key = Column(Integer, primary_key=True)
+    stop_sequence = Column(Integer, primary_key=True)
+    stop_key = Column(Integer, primary_key=True)
+    # Copied from trips when the feed is loaded, so arrivals are read without a join
+    route_key = Column(Integer, nullable=False)
+    direction_id = Column(Integer, nullable=False)
+    service_id = Column(String, nullable=False)
+    trip_number = Column(String, nullable=False)
+    headsign = Column(String, nullable=False)
+    arrival_time = Column(Time, nullable=False)
+    departure_time = Column(Time, nullable=False)
+    # Seconds since the start of the service day, past 86400 for arrivals after midnight
+    arrival_seconds = Column(Integer, nullable=False)
\ No newline at end of file
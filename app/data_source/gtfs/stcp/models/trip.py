@@ -4,11 +4,15 @@ from app.core.database import Base
 
 class Trip(Base):
     __tablename__ = "trips"
+    __table_args__ = (
+        # Trips of a route, optionally by direction and service (see TripService, BusService)
+        Index("ix_trips_route_direction_service", "route_id", "direction_id", "service_id"),
+    )
     
-    trip_id = Column(String, primary_key=True, index=True)
-    route_id = Column(String, nullable=False, index=True)
-    direction_id = Column(Integer, nullable=False, index=True)
-    service_id = Column(String, nullable=False, index=True)
-    trip_number = Column(String, nullable=False, index=True)
+    trip_id = Column(String, primary_key=True)
+    route_id = Column(String, nullable=False)
+    direction_id = Column(Integer, nullable=False)
+    service_id = Column(String, nullable=False)
+    trip_number = Column(String, nullable=False)
     headsign = Column(String, nullable=False)
     wheelchair_accessible = Column(Boolean, nullable=False, default=False)
\ No newline at end of file
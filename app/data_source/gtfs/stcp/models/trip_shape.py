@@ -5,5 +5,5 @@ from app.core.database import Base
 class TripShape(Base):
     __tablename__ = "trip_shapes"
     
-    trip_id = Column(String, primary_key=True, index=True)
-    shape_id = Column(String, nullable=False, index=True)
\ No newline at end of file
+    trip_id = Column(String, primary_key=True)
+    shape_id = Column(String, nullable=False)
\ No newline at end of file
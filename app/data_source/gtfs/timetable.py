@@ -0,0 +1,72 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import time
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app.data_source.gtfs.keys import key_of
+from app.data_source.gtfs.stcp.models.stop_key import StopKey
+from app.data_source.gtfs.stcp.models.stop_visit import StopVisit
+from app.data_source.gtfs.stcp.models.trip_key import TripKey
+
+
+class StopTimetable:
+    """
+    The visits of one stop on one service day, as parallel arrays sorted by
+    arrival (then trip id and stop sequence, the order the API returns them
+    in), so the visits of a time range are found with a binary search.
+    """
+
+    __slots__ = ("seconds", "departures", "trips", "sequences")
+
+    def __init__(self):
+        # Arrival, in seconds since the start of the service day
+        self.seconds = array("i")
+        # Departure time of day, in seconds
+        self.departures = array("i")
+        # Position of the trip in FeedRepository.trips
+        self.trips = array("i")
+        self.sequences = array("i")
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+    def between(self, start: int, end: int) -> range:
+        """Positions of the visits arriving from start to end seconds, inclusive."""
+        return range(bisect_left(self.seconds, start), bisect_right(self.seconds, end))
+
+    def departure_time(self, position: int) -> time:
+        seconds = self.departures[position]
+        return time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+def load_stop_timetables(db: Session, stop_id: str, trip_positions: Dict[str, int]) -> Dict[str, StopTimetable]:
+    """The timetables of a stop by service_id, read from stop_visits."""
+    visits = db.query(
+        StopVisit.service_id,
+        StopVisit.arrival_seconds,
+        StopVisit.departure_time,
+        TripKey.id,
+        StopVisit.stop_sequence,
+    ).join(
+        TripKey, TripKey.key == StopVisit.trip_key
+    ).filter(
+        StopVisit.stop_key == key_of(StopKey, stop_id)
+    ).order_by(
+        StopVisit.service_id, StopVisit.arrival_seconds, TripKey.id, StopVisit.stop_sequence
+    )
+
+    timetables: Dict[str, StopTimetable] = {}
+    for service_id, seconds, departure, trip_id, sequence in visits:
+        trip_position = trip_positions.get(trip_id)
+        if trip_position is None:
+            continue
+        timetable = timetables.get(service_id)
+        if timetable is None:
+            timetable = timetables[service_id] = StopTimetable()
+        timetable.seconds.append(seconds)
+        timetable.departures.append(departure.hour * 3600 + departure.minute * 60 + departure.second)
+        timetable.trips.append(trip_position)
+        timetable.sequences.append(sequence)
+    return timetables
@@ -0,0 +1,369 @@
+import csv
+import hashlib
+import io
+import json
+from contextlib import contextmanager
+from itertools import islice
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import LargeBinary, Table, and_, bindparam, delete, insert, inspect, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.data_source.gtfs.stcp.models.feed_row_hash import FeedRowHash
+
+# Rows sent to the database per executemany/COPY round trip
+DEFAULT_BATCH_SIZE = 10000
+
+# COPY ... WITH (FORMAT csv) reads unquoted empty fields as NULL by default,
+# which would turn empty strings into NULLs, so NULL gets its own marker
+COPY_NULL = "\\N"
+
+# Lock shared by every process of a parallel populate run (see scheduler.py).
+# When set, each batch is written and committed while holding it, so only
+# one process writes to the database at a time while the others keep parsing.
+_write_lock = None
+
+# Whether create_writer hands out IncrementalWriters (see --incremental in populate_stcp.py)
+_incremental = settings.GTFS_INCREMENTAL_LOAD
+
+
+def set_write_lock(lock) -> None:
+    global _write_lock
+    _write_lock = lock
+
+
+def set_incremental(enabled: bool) -> None:
+    global _incremental
+    _incremental = enabled
+
+
+def is_incremental() -> bool:
+    return _incremental
+
+
+class BulkWriter:
+    """
+    Writes plain tuples into a table without building ORM objects.
+
+    Rows are given in the order of `columns`. On PostgreSQL each batch is
+    streamed with COPY; on other databases it is sent as a single
+    executemany of tuples through the SQLAlchemy connection.
+
+    clear() also drops the secondary indexes of the table, and finish()
+    builds them again in one pass over the loaded rows and refreshes the
+    planner statistics with ANALYZE.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        table: Table,
+        columns: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.db = db
+        self.table = table
+        self.columns = list(columns)
+        self.batch_size = batch_size
+
+        self.rows_written = 0
+        self.elapsed = 0.0
+        self.lock = _write_lock
+        self._indexes_dropped = False
+
+        self.dialect = db.get_bind().dialect
+        self.use_copy = self.dialect.name == "postgresql"
+
+        # csv.writer would write bytes as their repr, so COPY gets bytea
+        # values in PostgreSQL's hex text format instead
+        self._binary_columns = [
+            index for index, column in enumerate(self.columns) if isinstance(table.c[column].type, LargeBinary)
+        ]
+
+        # Column types whose values need converting before they reach the driver
+        # (e.g. sqlite stores TIME/DATE as strings and BOOLEAN as integers)
+        self._processors = [
+            table.c[column].type.dialect_impl(self.dialect).bind_processor(self.dialect)
+            for column in self.columns
+        ]
+
+        statement = insert(table).values({column: bindparam(column) for column in self.columns})
+        compiled = statement.compile(dialect=self.dialect)
+        self._positional = compiled.positional
+        self._insert_sql = str(compiled)
+        self._insert = insert(table)
+
+        # The compiled statement lists the columns in table order, which may
+        # differ from the order the rows are given in
+        self._parameter_order = None
+        if self._positional:
+            order = [self.columns.index(name) for name in compiled.positiontup]
+            if order != list(range(len(self.columns))):
+                self._parameter_order = order
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.rows_written / self.elapsed
+
+    @contextmanager
+    def _serialized(self):
+        if self.lock is None:
+            yield
+            return
+        with self.lock:
+            yield
+            self.db.commit()
+
+    def clear(self) -> None:
+        with self._serialized():
+            self._drop_indexes()
+            self.db.execute(delete(self.table))
+            # The table no longer matches its manifest, so the next incremental
+            # load has to rebuild it
+            self.db.execute(delete(FeedRowHash.__table__).where(FeedRowHash.table_name == self.table.name))
+
+    def finish(self) -> None:
+        if not self._indexes_dropped:
+            return
+        start = perf_counter()
+        with self._serialized():
+            connection = self.db.connection()
+            for index in self.table.indexes:
+                index.create(connection)
+            connection.execute(text(f"ANALYZE {self.dialect.identifier_preparer.format_table(self.table)}"))
+        self.elapsed += perf_counter() - start
+        self._indexes_dropped = False
+
+    def _drop_indexes(self) -> None:
+        # Every index the table has in the database, so indexes that were
+        # removed from the model since the last load go away as well
+        connection = self.db.connection()
+        preparer = self.dialect.identifier_preparer
+        for index in inspect(connection).get_indexes(self.table.name):
+            connection.execute(text(f"DROP INDEX {preparer.quote(index['name'])}"))
+        self._indexes_dropped = True
+
+    def write(self, rows: Iterable[Tuple[Any, ...]]) -> int:
+        rows = iter(rows)
+        written = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+
+            with self._serialized():
+                start = perf_counter()
+                if self.use_copy:
+                    self._copy(batch)
+                else:
+                    self._executemany(batch)
+                self.elapsed += perf_counter() - start
+
+            written += len(batch)
+
+        self.rows_written += written
+        return written
+
+    def _process(self, batch: list) -> list:
+        if not batch or (not any(self._processors) and self._parameter_order is None):
+            return batch
+        # Converted and reordered a column at a time, which keeps the per-value
+        # work in map/zip instead of a Python loop over every row
+        columns = list(zip(*batch))
+        for index, processor in enumerate(self._processors):
+            if processor is not None:
+                columns[index] = map(processor, columns[index])
+        if self._parameter_order is not None:
+            columns = [columns[index] for index in self._parameter_order]
+        return list(zip(*columns))
+
+    def _executemany(self, batch: list) -> None:
+        if self._positional:
+            self.db.connection().exec_driver_sql(self._insert_sql, self._process(batch))
+        else:
+            self.db.execute(self._insert, [dict(zip(self.columns, row)) for row in batch])
+
+    def _copy(self, batch: list) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            values = [COPY_NULL if value is None else value for value in row]
+            for index in self._binary_columns:
+                if row[index] is not None:
+                    values[index] = "\\x" + row[index].hex()
+            writer.writerow(values)
+        buffer.seek(0)
+
+        preparer = self.dialect.identifier_preparer
+        table_name = preparer.format_table(self.table)
+        column_names = ", ".join(preparer.quote(column) for column in self.columns)
+
+        # psycopg2 cursor of the connection the session is currently using
+        dbapi_connection = self.db.connection().connection.dbapi_connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table_name} ({column_names}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer,
+            )
+
+
+class IncrementalWriter(BulkWriter):
+    """
+    Applies only the difference between the rows being written and the
+    previous load of the same table.
+
+    Every row is hashed and looked up by its primary key in the
+    feed_row_hashes manifest: new keys are inserted, keys whose hash changed
+    are updated, unchanged rows are skipped, and keys that were not written
+    again are deleted by finish(). Tables that have rows but no manifest
+    (e.g. after a full load) are rebuilt from scratch once.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        table: Table,
+        columns: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        super().__init__(db, table, columns, batch_size)
+
+        self.key_columns = [column.name for column in table.primary_key.columns]
+        self._key_indexes = [self.columns.index(column) for column in self.key_columns]
+        self._value_columns = [column for column in self.columns if column not in self.key_columns]
+
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+
+        manifest = FeedRowHash.__table__
+        self._previous: Dict[str, str] = dict(
+            db.execute(
+                select(manifest.c.row_key, manifest.c.row_hash).where(manifest.c.table_name == table.name)
+            ).all()
+        )
+        self._rebuild = not self._previous and db.execute(select(table).limit(1)).first() is not None
+
+        key_match = and_(*[table.c[column] == bindparam(f"key_{column}") for column in self.key_columns])
+        self._update = update(table).where(key_match).values(
+            {column: bindparam(f"value_{column}") for column in self._value_columns}
+        )
+        self._delete = delete(table).where(key_match)
+
+        self._manifest_insert = insert(manifest)
+        self._manifest_update = (
+            update(manifest)
+            .where(and_(manifest.c.table_name == table.name, manifest.c.row_key == bindparam("key")))
+            .values(row_hash=bindparam("hash"))
+        )
+        self._manifest_delete = delete(manifest).where(
+            and_(manifest.c.table_name == table.name, manifest.c.row_key == bindparam("key"))
+        )
+
+    def clear(self) -> None:
+        # Rows are reconciled key by key instead; only a table without a
+        # manifest has to be emptied before it is rebuilt
+        if self._rebuild:
+            super().clear()
+            self._rebuild = False
+
+    def _row_key(self, row: Tuple[Any, ...]) -> str:
+        return json.dumps([row[index] for index in self._key_indexes], separators=(",", ":"))
+
+    @staticmethod
+    def _row_hash(row: Tuple[Any, ...]) -> str:
+        return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=8).hexdigest()
+
+    def write(self, rows: Iterable[Tuple[Any, ...]]) -> int:
+        rows = iter(rows)
+        written = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+
+            start = perf_counter()
+            inserts = []
+            updates = []
+            new_hashes = []
+            changed_hashes = []
+            for row in batch:
+                key = self._row_key(row)
+                digest = self._row_hash(row)
+                previous = self._previous.pop(key, None)
+                if previous is None:
+                    inserts.append(row)
+                    new_hashes.append({"table_name": self.table.name, "row_key": key, "row_hash": digest})
+                elif previous != digest:
+                    updates.append(row)
+                    changed_hashes.append({"key": key, "hash": digest})
+                else:
+                    self.unchanged += 1
+
+            with self._serialized():
+                if inserts:
+                    self._executemany(inserts)
+                    self.db.execute(self._manifest_insert, new_hashes)
+                if updates:
+                    self.db.execute(self._update, [self._update_params(row) for row in updates])
+                    self.db.execute(self._manifest_update, changed_hashes)
+            self.elapsed += perf_counter() - start
+
+            self.inserted += len(inserts)
+            self.updated += len(updates)
+            written += len(batch)
+
+        self.rows_written += written
+        return written
+
+    def _update_params(self, row: Tuple[Any, ...]) -> Dict[str, Any]:
+        values = dict(zip(self.columns, row))
+        params = {f"key_{column}": values[column] for column in self.key_columns}
+        params.update({f"value_{column}": values[column] for column in self._value_columns})
+        return params
+
+    def finish(self) -> None:
+        # Whatever is left in the previous manifest was not part of this load
+        removed: List[str] = list(self._previous)
+        start = perf_counter()
+        for offset in range(0, len(removed), self.batch_size):
+            keys = removed[offset:offset + self.batch_size]
+            with self._serialized():
+                self.db.execute(
+                    self._delete,
+                    [
+                        {f"key_{column}": value for column, value in zip(self.key_columns, json.loads(key))}
+                        for key in keys
+                    ],
+                )
+                self.db.execute(self._manifest_delete, [{"key": key} for key in keys])
+        self.elapsed += perf_counter() - start
+
+        self.deleted += len(removed)
+        self._previous = {}
+
+        # Indexes were dropped if the table had to be rebuilt
+        super().finish()
+
+    @property
+    def changes(self) -> str:
+        return (
+            f"{self.table.name}: {self.inserted} inserted, {self.updated} updated, "
+            f"{self.deleted} deleted, {self.unchanged} unchanged"
+        )
+
+
+def create_writer(
+    db: Session,
+    table: Table,
+    columns: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> BulkWriter:
+    if _incremental:
+        return IncrementalWriter(db, table, columns, batch_size)
+    return BulkWriter(db, table, columns, batch_size)
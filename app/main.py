@@ -3,9 +3,13 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from contextlib import asynccontextmanager
-from app.api.endpoints import stops, service_days, routes, trips, buses, auth
+from app.api.endpoints import stops, service_days, routes, trips, buses, auth, cache
+from app.core.database import Base, SessionLocal, get_engine
+from app.data_source.gtfs.repository import get_feed_repository
 from app.data_source.gtfs.stcp.models import *
 from app.services.bus_service import run_periodic_bus_updates
+from app.api.utils.compression import CompressionMiddleware
+from app.api.utils.etag import NotModified, not_modified_handler
 from app.api.utils.error_handler import (
     http_exception_handler,
     validation_exception_handler,
@@ -16,6 +20,16 @@ from app.core.config import settings
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Load the static feed before the first request needs it
+    Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    try:
+        get_feed_repository(db)
+    except Exception as e:
+        print(f"Error loading the feed repository: {e}")
+    finally:
+        db.close()
+    
     # Start background task for periodic bus updates
     import asyncio
     update_task = asyncio.create_task(run_periodic_bus_updates(interval_seconds=15))
@@ -44,11 +58,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.RESPONSE_COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+        gzip_level=settings.RESPONSE_COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY,
+    )
+
+app.add_exception_handler(NotModified, not_modified_handler)
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
 app.include_router(auth.router, prefix="/api/v1")
+app.include_router(cache.router, prefix="/api/v1")
 app.include_router(stops.router, prefix="/api/v1/stcp")
 app.include_router(service_days.router, prefix="/api/v1/stcp")
 app.include_router(routes.router, prefix="/api/v1/stcp")
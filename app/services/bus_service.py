@@ -2,17 +2,18 @@ import asyncio
 from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
-from app.core.database import SessionLocal, engine, Base
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine, refresh_engine, Base
 from app.data_source.fiware.client import FIWAREClient
 from app.data_source.fiware.parser import FIWAREParser
+from app.data_source.gtfs.repository import FeedRepository, get_feed_repository
 from app.data_source.gtfs.stcp.models.bus import Bus as BusModel
-from app.data_source.gtfs.stcp.models.trip import Trip as TripModel
-from app.data_source.gtfs.stcp.models.route_direction import RouteDirection as RouteDirectionModel
 from app.api.schemas.bus import Bus, BusTrip, BusRoute, BusCoordinates
 
 
 async def update_buses():
-    Base.metadata.create_all(bind=engine)
+    refresh_engine()
+    Base.metadata.create_all(bind=get_engine())
     
     try:
         vehicles_data = await FIWAREClient.fetch_vehicles(limit=1000)
@@ -82,25 +83,27 @@ async def run_periodic_bus_updates(interval_seconds: int = 15):
 class BusService:
     
     @staticmethod
-    def _model_to_schema(db_bus: BusModel, db: Session) -> Bus:
+    def _trip_and_route(
+        route_id: Optional[str],
+        direction_id: Optional[int],
+        service_id: Optional[str],
+        feed: FeedRepository
+    ) -> Tuple[Optional[BusTrip], Optional[BusRoute]]:
         trip = None
         route = None
 
         # FIWARE does not return the trip_number
         
         # get trip from route_id, direction_id, and service_id
-        if db_bus.route_id and db_bus.direction_id is not None and db_bus.service_id:
-            db_trip = db.query(TripModel).filter(
-                and_(
-                    TripModel.route_id == db_bus.route_id,
-                    TripModel.direction_id == db_bus.direction_id,
-                    TripModel.service_id == db_bus.service_id
-                )
-            ).first()
+        if route_id and direction_id is not None and service_id:
+            db_trips = feed.trips_by_route_direction_service.get(
+                (route_id, direction_id, service_id)
+            )
             
-            if db_trip:
+            if db_trips:
+                db_trip = db_trips[0]
                 # trip_id: route_id_direction_id_service_id
-                trip_id_without_number = f"{db_bus.route_id}_{db_bus.direction_id}_{db_bus.service_id}"
+                trip_id_without_number = f"{route_id}_{direction_id}_{service_id}"
                 
                 trip = BusTrip(
                     trip_id=trip_id_without_number,
@@ -110,28 +113,35 @@ class BusService:
                     wheelchair_accessible=db_trip.wheelchair_accessible
                 )
         
-        if db_bus.route_id and db_bus.direction_id is not None:
-            route_direction_query = db.query(RouteDirectionModel).filter(
-                and_(
-                    RouteDirectionModel.route_id == db_bus.route_id,
-                    RouteDirectionModel.direction_id == db_bus.direction_id
-                )
+        if route_id and direction_id is not None:
+            db_route_direction = next(
+                (
+                    rd for rd in feed.route_directions.get(route_id, [])
+                    if rd.direction_id == direction_id
+                    and (not service_id or rd.service_id == service_id)
+                ),
+                None
             )
             
-            if db_bus.service_id:
-                route_direction_query = route_direction_query.filter(
-                    RouteDirectionModel.service_id == db_bus.service_id
-                )
-            
-            db_route_direction = route_direction_query.first()
-            
             if db_route_direction:
                 route = BusRoute(
-                    route_id=db_bus.route_id,
+                    route_id=route_id,
                     headsign=db_route_direction.headsign,
-                    direction=str(db_bus.direction_id)
+                    direction=str(direction_id)
                 )
         
+        return trip, route
+    
+    @staticmethod
+    def _model_to_schema(db_bus: BusModel, feed: FeedRepository) -> Bus:
+        key = (db_bus.route_id, db_bus.direction_id, db_bus.service_id)
+        if settings.FAST_JSON_RESPONSES:
+            # The trip and route of a bus only depend on the loaded feed and
+            # the bus's route, direction and service
+            trip, route = feed.bus_trip_and_route(key, lambda: BusService._trip_and_route(*key, feed))
+        else:
+            trip, route = BusService._trip_and_route(*key, feed)
+        
         coordinates = BusCoordinates(
             lat=db_bus.lat,
             lon=db_bus.lon,
@@ -177,7 +187,8 @@ class BusService:
         skip = page * size
         db_buses = query.offset(skip).limit(size).all()
         
-        buses = [BusService._model_to_schema(bus, db) for bus in db_buses]
+        feed = get_feed_repository(db)
+        buses = [BusService._model_to_schema(bus, feed) for bus in db_buses]
         
         return buses, total
     
@@ -186,5 +197,5 @@ class BusService:
         db_bus = db.query(BusModel).filter(BusModel.vehicle_id == vehicle_id).first()
         
         if db_bus:
-            return BusService._model_to_schema(db_bus, db)
+            return BusService._model_to_schema(db_bus, get_feed_repository(db))
         return None
\ No newline at end of file
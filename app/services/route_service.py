@@ -1,14 +1,22 @@
 from typing import List, Optional, Dict, Tuple
 from collections import defaultdict
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.data_source.gtfs.keys import key_of
+from app.data_source.gtfs.packed import unpack_shape_points
+from app.data_source.gtfs.repository import get_feed_repository
 from app.data_source.gtfs.stcp.models.route import Route as RouteModel
 from app.data_source.gtfs.stcp.models.route_direction import RouteDirection as RouteDirectionModel
 from app.data_source.gtfs.stcp.models.route_shape import RouteShape as RouteShapeModel
 from app.data_source.gtfs.stcp.models.route_stop import RouteStop as RouteStopModel
 from app.data_source.gtfs.stcp.models.stop import Stop as StopModel
 from app.data_source.gtfs.stcp.models.shape import Shape as ShapeModel
-from app.data_source.gtfs.stcp.models.trip import Trip as TripModel
-from app.data_source.gtfs.stcp.models.trip_stop import TripStop as TripStopModel
+from app.data_source.gtfs.stcp.models.packed_shape import PackedShape as PackedShapeModel
+from app.data_source.gtfs.stcp.models.route_key import RouteKey as RouteKeyModel
+from app.data_source.gtfs.stcp.models.shape_key import ShapeKey as ShapeKeyModel
+from app.data_source.gtfs.stcp.models.stop_key import StopKey as StopKeyModel
+from app.data_source.gtfs.stcp.models.stop_visit import StopVisit as StopVisitModel
 from app.api.schemas.route import Route, RouteDirectionItem, RouteStop, RouteStopRouteInfo, RouteStopStopInfo
 from app.api.schemas.route_direction import RouteDirection
 from app.api.schemas.shape import RouteShape, ShapePoint
@@ -29,11 +37,7 @@ class RouteService:
         )
         
         if include_service_days:
-            service_ids = db.query(RouteDirectionModel.service_id).filter(
-                RouteDirectionModel.route_id == db_route.id
-            ).distinct().all()
-            
-            route.service_days = [service_id for (service_id,) in service_ids]
+            route.service_days = list(get_feed_repository(db).route_service_ids.get(db_route.id, []))
         
         return route
     
@@ -44,7 +48,7 @@ class RouteService:
         include_directions: bool = True,
         service_ids: Optional[List[str]] = None
     ) -> Optional[Route]:
-        db_route = db.query(RouteModel).filter(RouteModel.id == route_id).first()
+        db_route = get_feed_repository(db).routes_by_id.get(route_id)
         if db_route:
             route = RouteService._model_to_schema(db_route, db=db, include_service_days=True)
             if include_directions:
@@ -79,20 +83,17 @@ class RouteService:
         size: int = 100
     ) -> Tuple[List[Route], int]:
 
-        query = db.query(RouteModel)
+        feed = get_feed_repository(db)
+        db_routes = feed.routes
         
         if service_ids:
-            route_ids = [
-                rd.route_id for rd in db.query(RouteDirectionModel.route_id).filter(
-                    RouteDirectionModel.service_id.in_(service_ids)
-                ).distinct().all()
-            ]
-            query = query.filter(RouteModel.id.in_(route_ids))
+            route_ids = set().union(*(feed.routes_by_service.get(service_id, ()) for service_id in service_ids))
+            db_routes = [route for route in db_routes if route.id in route_ids]
         
-        total = query.count()
+        total = len(db_routes)
         
         skip = page * size
-        db_routes = query.offset(skip).limit(size).all()
+        db_routes = db_routes[skip:skip + size]
         
         routes = [RouteService._model_to_schema(route, db=db, include_service_days=True) for route in db_routes]
         return routes, total
@@ -113,15 +114,14 @@ class RouteService:
         direction_id: Optional[int] = None,
         service_ids: Optional[List[str]] = None,
     ) -> List[RouteDirection]:
-        query = db.query(RouteDirectionModel).filter(RouteDirectionModel.route_id == route_id)
+        db_route_directions = get_feed_repository(db).route_directions.get(route_id, [])
         
         if direction_id is not None:
-            query = query.filter(RouteDirectionModel.direction_id == direction_id)
+            db_route_directions = [rd for rd in db_route_directions if rd.direction_id == direction_id]
         
         if service_ids:
-            query = query.filter(RouteDirectionModel.service_id.in_(service_ids))
+            db_route_directions = [rd for rd in db_route_directions if rd.service_id in service_ids]
         
-        db_route_directions = query.all()
         return [RouteService._route_direction_model_to_schema(rd) for rd in db_route_directions]
     
     @staticmethod
@@ -140,6 +140,8 @@ class RouteService:
         route_id: str,
         direction_id: Optional[int] = None
     ) -> List[RouteShape]:
+        if settings.GTFS_PACKED_STORAGE:
+            return RouteService._get_packed_route_shapes(db, route_id, direction_id)
         
         # Query route_shapes table directly
         query = db.query(RouteShapeModel).filter(RouteShapeModel.route_id == route_id)
@@ -153,16 +155,18 @@ class RouteService:
         shape_ids = [rs.shape_id for rs in route_shapes]
         
         # Get all shape points for these shape_ids, ordered by shape_id and sequence
-        db_shapes = db.query(ShapeModel).filter(
-            ShapeModel.id.in_(shape_ids)
-        ).order_by(ShapeModel.id, ShapeModel.sequence).all()
+        db_shapes = db.query(ShapeModel, ShapeKeyModel.id).join(
+            ShapeKeyModel, ShapeKeyModel.key == ShapeModel.shape_key
+        ).filter(
+            ShapeKeyModel.id.in_(shape_ids)
+        ).order_by(ShapeKeyModel.id, ShapeModel.sequence).all()
         
         # Group shape points by shape_id
         shapes_dict: Dict[str, List[ShapePoint]] = {}
-        for db_shape in db_shapes:
-            if db_shape.id not in shapes_dict:
-                shapes_dict[db_shape.id] = []
-            shapes_dict[db_shape.id].append(
+        for db_shape, shape_id in db_shapes:
+            if shape_id not in shapes_dict:
+                shapes_dict[shape_id] = []
+            shapes_dict[shape_id].append(
                 RouteService._shape_point_model_to_schema(db_shape)
             )
         
@@ -181,6 +185,42 @@ class RouteService:
         
         return all_route_shapes
     
+    @staticmethod
+    def _get_packed_route_shapes(
+        db: Session,
+        route_id: str,
+        direction_id: Optional[int] = None
+    ) -> List[RouteShape]:
+        query = db.query(
+            RouteShapeModel.shape_id,
+            RouteShapeModel.direction_id,
+            PackedShapeModel.points
+        ).join(
+            ShapeKeyModel, ShapeKeyModel.id == RouteShapeModel.shape_id
+        ).join(
+            PackedShapeModel, PackedShapeModel.shape_key == ShapeKeyModel.key
+        ).filter(RouteShapeModel.route_id == route_id)
+        if direction_id is not None:
+            query = query.filter(RouteShapeModel.direction_id == direction_id)
+        
+        all_route_shapes = []
+        for shape_id, shape_direction_id, packed_points in query.all():
+            points = [
+                ShapePoint(sequence=sequence, coordinates=Coordinates(latitude=lat, longitude=lon))
+                for sequence, lat, lon in unpack_shape_points(packed_points)
+            ]
+            if points:
+                all_route_shapes.append(RouteShape(
+                    shape_id=shape_id,
+                    direction_id=shape_direction_id,
+                    points=points
+                ))
+        
+        # Sort by direction_id and shape_id
+        all_route_shapes.sort(key=lambda x: (x.direction_id, x.shape_id))
+        
+        return all_route_shapes
+    
     @staticmethod
     def get_route_stops(
         db: Session,
@@ -217,48 +257,34 @@ class RouteService:
                 for rs, stop_name, zone_id in results
             ]
         
-        # Fallback: derive from trip_stops if route_stops table is empty
-        # Get trips for this route
-        trip_query = db.query(TripModel).filter(TripModel.route_id == route_id)
-        if direction_id is not None:
-            trip_query = trip_query.filter(TripModel.direction_id == direction_id)
-        
-        trips = trip_query.all()
-        
-        if not trips:
-            return []
-        
-        trip_ids = [trip.trip_id for trip in trips]
-        
-        # Get unique stops with their sequences from trip_stops
+        # Fallback: derive from stop_visits if route_stops table is empty
+        # (it carries the route and direction of every visit).
         # Group by direction_id, stop_id and take the minimum sequence
-        from sqlalchemy import func
-        
-        trip_stops_query = db.query(
-            TripModel.direction_id,
-            TripStopModel.stop_id,
-            func.min(TripStopModel.sequence).label('min_sequence'),
+        visits_query = db.query(
+            StopVisitModel.direction_id,
+            StopModel.id,
+            func.min(StopVisitModel.stop_sequence).label('min_sequence'),
             StopModel.name,
             StopModel.zone_id
         ).join(
-            TripStopModel, TripModel.trip_id == TripStopModel.trip_id
+            StopKeyModel, StopKeyModel.key == StopVisitModel.stop_key
         ).join(
-            StopModel, TripStopModel.stop_id == StopModel.id
+            StopModel, StopKeyModel.id == StopModel.id
         ).filter(
-            TripModel.trip_id.in_(trip_ids)
+            StopVisitModel.route_key == key_of(RouteKeyModel, route_id)
         ).group_by(
-            TripModel.direction_id,
-            TripStopModel.stop_id,
+            StopVisitModel.direction_id,
+            StopModel.id,
             StopModel.name,
             StopModel.zone_id
         )
         
         if direction_id is not None:
-            trip_stops_query = trip_stops_query.filter(TripModel.direction_id == direction_id)
+            visits_query = visits_query.filter(StopVisitModel.direction_id == direction_id)
         
-        trip_stops_results = trip_stops_query.order_by(
-            TripModel.direction_id,
-            func.min(TripStopModel.sequence)
+        visits_results = visits_query.order_by(
+            StopVisitModel.direction_id,
+            func.min(StopVisitModel.stop_sequence)
         ).all()
         
         return [
@@ -274,5 +300,5 @@ class RouteService:
                 ),
                 sequence=int(min_sequence)
             )
-            for dir_id, stop_id, min_sequence, stop_name, zone_id in trip_stops_results
+            for dir_id, stop_id, min_sequence, stop_name, zone_id in visits_results
         ]
\ No newline at end of file
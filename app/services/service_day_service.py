@@ -2,6 +2,7 @@ from typing import List, Optional
 from datetime import date
 import json
 from sqlalchemy.orm import Session
+from app.data_source.gtfs.repository import get_feed_repository
 from app.data_source.gtfs.stcp.models.service_day import ServiceDay as ServiceDayModel
 from app.api.schemas.service_day import ServiceDay
 
@@ -23,15 +24,17 @@ class ServiceDayService:
     def get_service_day_by_id_or_type(db: Session, identifier: str) -> Optional[ServiceDay]:
         # allows both service_id and service_type as IDs
 
+        feed = get_feed_repository(db)
+
         # Try as service_id
-        db_service_day = db.query(ServiceDayModel).filter(ServiceDayModel.service_id == identifier).first()
+        db_service_day = feed.service_days_by_id.get(identifier)
         if db_service_day:
             return ServiceDayService._model_to_schema(db_service_day)
         
         # If not found, try as service_type
         try:
             service_type = int(identifier)
-            db_service_day = db.query(ServiceDayModel).filter(ServiceDayModel.service_type == service_type).first()
+            db_service_day = feed.service_days_by_type.get(service_type)
             if db_service_day:
                 return ServiceDayService._model_to_schema(db_service_day)
         except ValueError:
@@ -41,7 +44,7 @@ class ServiceDayService:
     
     @staticmethod
     def get_service_days(db: Session) -> List[ServiceDay]:
-        db_service_days = db.query(ServiceDayModel).all()
+        db_service_days = get_feed_repository(db).service_days
         return [ServiceDayService._model_to_schema(sd) for sd in db_service_days]
 
     @staticmethod
@@ -57,8 +60,8 @@ class ServiceDayService:
         target_date = on_date or date.today()
         weekday_idx = target_date.weekday()  # Monday=0 ... Sunday=6
         
-        # Query all service days (ignore both start_date and end_date)
-        all_service_days = db.query(ServiceDayModel).all()
+        # All service days (ignore both start_date and end_date)
+        all_service_days = get_feed_repository(db).service_days
         
         best = None
         for sd in all_service_days:
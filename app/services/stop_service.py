@@ -1,10 +1,20 @@
-from typing import Dict, List, Optional, Tuple
+import heapq
+import math
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import date, datetime, time, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
+from app.core.config import settings
 from app.data_source.gtfs.stcp.models.stop import Stop as StopModel
-from app.data_source.gtfs.stcp.models.scheduled_arrival import ScheduledArrival as ScheduledArrivalModel
-from app.data_source.gtfs.stcp.models.trip import Trip as TripModel
+from app.data_source.gtfs.keys import key_of
+from app.data_source.gtfs.repository import FeedRepository, get_feed_repository
+from app.data_source.gtfs.normalizer import SECONDS_PER_DAY, time_of_day
+from app.data_source.gtfs.timetable import StopTimetable
+from app.data_source.gtfs.stcp.models.route_key import RouteKey as RouteKeyModel
+from app.data_source.gtfs.stcp.models.stop_key import StopKey as StopKeyModel
+from app.data_source.gtfs.stcp.models.stop_visit import StopVisit as StopVisitModel
+from app.data_source.gtfs.stcp.models.trip_key import TripKey as TripKeyModel
 from app.data_source.stcp.client import STCPClient
 from app.data_source.stcp.parser import STCPParser
 from app.api.schemas.stop import Stop
@@ -29,9 +39,32 @@ class StopService:
             zone_id=db_stop.zone_id
         )
     
+    @staticmethod
+    def _arrival_to_schema(arrival: StopVisitModel, trip_id: str, route_id: str, stop_id: str) -> ScheduledArrival:
+        return ScheduledArrival(
+            trip=TripInfo(
+                id=trip_id,
+                route_id=route_id,
+                direction_id=arrival.direction_id,
+                service_id=arrival.service_id,
+                number=arrival.trip_number,
+                headsign=arrival.headsign
+            ),
+            stop=StopInfo(
+                id=stop_id,
+                sequence=arrival.stop_sequence
+            ),
+            arrival_time=arrival.arrival_time,
+            departure_time=arrival.departure_time
+        )
+    
     @staticmethod
     def get_stop_by_id(db: Session, stop_id: str) -> Optional[Stop]:
-        db_stop = db.query(StopModel).filter(StopModel.id == stop_id).first()
+        feed = get_feed_repository(db)
+        if settings.FAST_JSON_RESPONSES:
+            return feed.stop_schemas(StopService._model_to_schema).get(stop_id)
+        
+        db_stop = feed.stops_by_id.get(stop_id)
         if db_stop:
             return StopService._model_to_schema(db_stop)
         return None
@@ -44,21 +77,22 @@ class StopService:
         size: Optional[int] = 100
     ) -> Tuple[List[Stop], int]:
 
-        query = db.query(StopModel)
+        feed = get_feed_repository(db)
+        db_stops = feed.stops_by_zone.get(zone_id, []) if zone_id else feed.stops
         
-        if zone_id:
-            query = query.filter(StopModel.zone_id == zone_id)
-        
-        total = query.count()
+        total = len(db_stops)
         
         # If no size is provided, return all stops without pagination
-        if size is None:
-            db_stops = query.all()
-        else:
-            skip = page * size
-            db_stops = query.offset(skip).limit(size).all()
+        skip = page * size if size is not None else 0
+        end = skip + size if size is not None else total
+        
+        if settings.FAST_JSON_RESPONSES:
+            feed_stops = feed.stop_schemas(StopService._model_to_schema)
+            if not zone_id:
+                return list(feed_stops.values())[skip:end], total
+            return [feed_stops[stop.id] for stop in db_stops[skip:end]], total
         
-        stops = [StopService._model_to_schema(stop) for stop in db_stops]
+        stops = [StopService._model_to_schema(stop) for stop in db_stops[skip:end]]
         return stops, total
     
     @staticmethod
@@ -74,104 +108,114 @@ class StopService:
         size: int = 100
     ) -> Tuple[List[ScheduledArrival], int]:
 
-        # Join with trips table to get route_id, direction_id, service_id, trip_number
-        query = db.query(ScheduledArrivalModel).join(
-            TripModel, ScheduledArrivalModel.trip_id == TripModel.trip_id
-        ).filter(
-            ScheduledArrivalModel.stop_id == stop_id
-        )
-        
-        # Apply optional filters
-        if route_id is not None:
-            query = query.filter(TripModel.route_id == route_id)
-        
-        if service_id is not None:
-            query = query.filter(TripModel.service_id == service_id)
-        elif service_id_dates:
-            query = query.filter(TripModel.service_id.in_(list(service_id_dates.keys())))
-
         if not window_start or not window_end:
+            query = db.query(StopVisitModel).filter(
+                StopVisitModel.stop_key == key_of(StopKeyModel, stop_id)
+            )
+            
+            # Apply optional filters
+            if route_id is not None:
+                query = query.filter(StopVisitModel.route_key == key_of(RouteKeyModel, route_id))
+            
+            if service_id is not None:
+                query = query.filter(StopVisitModel.service_id == service_id)
+            
             total = query.count()
             skip = page * size
-            arrivals = query.order_by(ScheduledArrivalModel.arrival_time).offset(skip).limit(size).all()
+            rows = StopService._with_trip_and_route_ids(query).order_by(
+                StopVisitModel.arrival_seconds,
+                TripKeyModel.id,
+                StopVisitModel.stop_sequence
+            ).offset(skip).limit(size).all()
+            return [
+                StopService._arrival_to_schema(arrival, trip_id, arrival_route_id, stop_id)
+                for arrival, trip_id, arrival_route_id in rows
+            ], total
 
-            # Convert to schema with trip and stop info
-            result = []
-            for arrival in arrivals:
-                trip = db.query(TripModel).filter(TripModel.trip_id == arrival.trip_id).first()
-                if trip:
-                    trip_info = TripInfo(
-                        id=arrival.trip_id,
-                        route_id=trip.route_id,
-                        direction_id=trip.direction_id,
-                        service_id=trip.service_id,
-                        number=trip.trip_number,
-                        headsign=trip.headsign
-                    )
-
-                    stop_info = StopInfo(
-                        id=arrival.stop_id,
-                        sequence=arrival.stop_sequence
-                    )
-
-                    scheduled_arrival = ScheduledArrival(
-                        trip=trip_info,
-                        stop=stop_info,
-                        arrival_time=arrival.arrival_time,
-                        departure_time=arrival.departure_time
-                    )
-                    result.append(scheduled_arrival)
-
-            return result, total
-
-
-        arrivals = query.all()
 
         service_id_dates = service_id_dates or {}
         if service_id is not None:
             service_id_dates.setdefault(service_id, [window_start.date(), window_end.date()])
 
-        candidates: List[tuple[datetime, ScheduledArrival]] = []
-
-        for arrival in arrivals:
-            trip = db.query(TripModel).filter(TripModel.trip_id == arrival.trip_id).first()
-            if not trip:
+        feed = get_feed_repository(db)
+        timetables = feed.stop_timetables(db, stop_id)
+
+        # Every service date covers the part of the window that falls on its
+        # service day, as a range of seconds since the start of that day,
+        # found by binary search in the stop's timetable for that service.
+        # The offset of the date puts the arrivals of all dates on the same clock.
+        ranges = []
+        for date_service_id, dates in service_id_dates.items():
+            timetable = timetables.get(date_service_id)
+            if timetable is None or (service_id is not None and date_service_id != service_id):
                 continue
-
-            trip_info = TripInfo(
-                id=arrival.trip_id,
+            for d in dates:
+                day_start = datetime.combine(d, time.min)
+                offset = (d - window_start.date()).days * SECONDS_PER_DAY
+                positions = timetable.between(
+                    math.ceil((window_start - day_start).total_seconds()),
+                    math.floor((window_end - day_start).total_seconds())
+                )
+                if route_id is not None:
+                    positions = [
+                        position for position in positions
+                        if feed.trips[timetable.trips[position]].route_id == route_id
+                    ]
+                ranges.append((timetable, offset, positions))
+
+        total = sum(len(positions) for _, _, positions in ranges)
+
+        skip = page * size
+        arrivals = islice(heapq.merge(*(
+            StopService._window_arrivals(feed, index, timetable, offset, positions)
+            for index, (timetable, offset, positions) in enumerate(ranges)
+        )), skip, skip + size)
+        return [
+            StopService._timetable_arrival_to_schema(feed.trips[timetable.trips[position]], timetable, position, stop_id)
+            for _, _, _, _, timetable, position in arrivals
+        ], total
+    
+    @staticmethod
+    def _window_arrivals(feed: FeedRepository, index: int, timetable: StopTimetable, offset: int, positions: Sequence[int]):
+        # Sort keys of the arrivals of one range, already in (arrival, trip id, stop sequence)
+        # order. The index of the range breaks ties before the timetable is compared.
+        for position in positions:
+            yield (
+                timetable.seconds[position] + offset,
+                feed.trips[timetable.trips[position]].trip_id,
+                timetable.sequences[position],
+                index,
+                timetable,
+                position
+            )
+    
+    @staticmethod
+    def _timetable_arrival_to_schema(trip, timetable: StopTimetable, position: int, stop_id: str) -> ScheduledArrival:
+        return ScheduledArrival(
+            trip=TripInfo(
+                id=trip.trip_id,
                 route_id=trip.route_id,
                 direction_id=trip.direction_id,
                 service_id=trip.service_id,
                 number=trip.trip_number,
                 headsign=trip.headsign
-            )
-
-            stop_info = StopInfo(
-                id=arrival.stop_id,
-                sequence=arrival.stop_sequence
-            )
-
-            scheduled_arrival = ScheduledArrival(
-                trip=trip_info,
-                stop=stop_info,
-                arrival_time=arrival.arrival_time,
-                departure_time=arrival.departure_time
-            )
-
-            dates_for_service = service_id_dates.get(trip.service_id, [])
-            for d in dates_for_service:
-                dt = datetime.combine(d, arrival.arrival_time)
-                if window_start <= dt <= window_end:
-                    candidates.append((dt, scheduled_arrival))
-
-        candidates.sort(key=lambda x: x[0])
-        total = len(candidates)
-
-        start = page * size
-        end = start + size
-        page_items = [item for _, item in candidates[start:end]]
-        return page_items, total
+            ),
+            stop=StopInfo(
+                id=stop_id,
+                sequence=timetable.sequences[position]
+            ),
+            arrival_time=time_of_day(timetable.seconds[position]),
+            departure_time=timetable.departure_time(position)
+        )
+    
+    @staticmethod
+    def _with_trip_and_route_ids(query):
+        # Arrivals refer to their trip and route by key; the ids come from the dictionary tables
+        return query.add_columns(TripKeyModel.id, RouteKeyModel.id).join(
+            TripKeyModel, TripKeyModel.key == StopVisitModel.trip_key
+        ).join(
+            RouteKeyModel, RouteKeyModel.key == StopVisitModel.route_key
+        )
     
     @staticmethod
     def calculate_scheduled_arrival_time(arrival_time: Optional[time], delay_minutes: Optional[int]) -> Optional[time]:
@@ -201,44 +245,41 @@ class StopService:
         
         target_seconds = scheduled_arrival_time.hour * 3600 + scheduled_arrival_time.minute * 60 + scheduled_arrival_time.second
         
-        # Join with trips table to filter by route_id, direction_id, service_id
-        scheduled_arrivals = db.query(ScheduledArrivalModel).join(
-            TripModel, ScheduledArrivalModel.trip_id == TripModel.trip_id
+        # Only arrivals within 1 minute of the scheduled arrival time can match.
+        # Arrivals after midnight are stored past 24:00:00 of their service day
+        targets = (target_seconds, target_seconds + SECONDS_PER_DAY)
+        scheduled_arrivals = db.query(
+            StopVisitModel.trip_number,
+            StopVisitModel.stop_sequence,
+            StopVisitModel.arrival_seconds,
         ).filter(
             and_(
-                TripModel.route_id == route_id,
-                TripModel.direction_id == direction_id,
-                TripModel.service_id == service_id,
-                ScheduledArrivalModel.stop_id == stop_id
+                StopVisitModel.stop_key == key_of(StopKeyModel, stop_id),
+                StopVisitModel.service_id == service_id,
+                StopVisitModel.route_key == key_of(RouteKeyModel, route_id),
+                StopVisitModel.direction_id == direction_id,
+                or_(*(
+                    StopVisitModel.arrival_seconds.between(target - 60, target + 60)
+                    for target in targets
+                ))
             )
         ).all()
         
-        best_match = None
-        min_diff = float('inf')
-        
-        for scheduled in scheduled_arrivals:
-            scheduled_seconds = scheduled.arrival_time.hour * 3600 + scheduled.arrival_time.minute * 60 + scheduled.arrival_time.second
-            diff = abs(scheduled_seconds - target_seconds)
-            
-            # find a trip that is within 1 minute of the scheduled arrival time
-            if diff <= 60 and diff < min_diff:
-                min_diff = diff
-                best_match = scheduled
-        
-        if best_match:
-            trip = db.query(TripModel).filter(TripModel.trip_id == best_match.trip_id).first()
-            if trip:
-                return {
-                    "trip_number": trip.trip_number,
-                    "stop_sequence": best_match.stop_sequence
-                }
+        if not scheduled_arrivals:
+            return None
         
-        return None
+        best_match = min(
+            scheduled_arrivals,
+            key=lambda scheduled: min(abs(scheduled.arrival_seconds - target) for target in targets)
+        )
+        return {
+            "trip_number": best_match.trip_number,
+            "stop_sequence": best_match.stop_sequence
+        }
 
     @staticmethod
     async def get_realtime_arrivals_response(db: Session, stop_id: str) -> Optional[Tuple[List[RealtimeArrival], int]]:
-        stop = db.query(StopModel).filter(StopModel.id == stop_id).first()
-        if not stop:
+        if stop_id not in get_feed_repository(db).stops_by_id:
             return None
 
         # Fetch real-time data from API
@@ -1,11 +1,18 @@
 from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from app.core.config import settings
+from app.data_source.gtfs.keys import key_of
+from app.data_source.gtfs.packed import unpack_shape_points
+from app.data_source.gtfs.repository import get_feed_repository
 from app.data_source.gtfs.stcp.models.trip import Trip as TripModel
 from app.data_source.gtfs.stcp.models.trip_shape import TripShape as TripShapeModel
-from app.data_source.gtfs.stcp.models.trip_stop import TripStop as TripStopModel
 from app.data_source.gtfs.stcp.models.stop import Stop as StopModel
 from app.data_source.gtfs.stcp.models.shape import Shape as ShapeModel
+from app.data_source.gtfs.stcp.models.packed_shape import PackedShape as PackedShapeModel
+from app.data_source.gtfs.stcp.models.shape_key import ShapeKey as ShapeKeyModel
+from app.data_source.gtfs.stcp.models.stop_key import StopKey as StopKeyModel
+from app.data_source.gtfs.stcp.models.stop_visit import StopVisit as StopVisitModel
+from app.data_source.gtfs.stcp.models.trip_key import TripKey as TripKeyModel
 from app.api.schemas.trip import Trip, TripInfo, TripStop, TripStopStopInfo
 from app.api.schemas.shape import ShapePoint, TripShapesResponse
 from app.api.schemas.shared import Coordinates
@@ -38,34 +45,29 @@ class TripService:
         size: int = 100
     ) -> Tuple[List[Trip], int]:
 
-        query = db.query(TripModel)
-        
-        filters = []
+        feed = get_feed_repository(db)
         
         if route_id:
-            filters.append(TripModel.route_id == route_id)
+            db_trips = feed.trips_by_route.get(route_id, [])
+            # Only apply if route_id is also provided
+            if direction_id is not None:
+                db_trips = [trip for trip in db_trips if trip.direction_id == direction_id]
+        else:
+            # If route_id is not provided, direction_id is ignored
+            db_trips = feed.trips
         
         if service_id:
             service_ids = [sid.strip() for sid in service_id.split(",") if sid.strip()]
             if service_ids:
-                filters.append(TripModel.service_id.in_(service_ids))
-        
-        if direction_id is not None:
-            # Only apply if route_id is also provided
-            if route_id:
-                filters.append(TripModel.direction_id == direction_id)
-            # If route_id is not provided, direction_id is ignored
+                db_trips = [trip for trip in db_trips if trip.service_id in service_ids]
         
         if wheelchair_accessible is not None:
-            filters.append(TripModel.wheelchair_accessible == wheelchair_accessible)
+            db_trips = [trip for trip in db_trips if trip.wheelchair_accessible == wheelchair_accessible]
         
-        if filters:
-            query = query.filter(and_(*filters))
-        
-        total = query.count()
+        total = len(db_trips)
         
         skip = page * size
-        db_trips = query.offset(skip).limit(size).all()
+        db_trips = db_trips[skip:skip + size]
         
         trips = [TripService._model_to_schema(trip) for trip in db_trips]
         
@@ -74,7 +76,7 @@ class TripService:
     @staticmethod
     def get_trip_by_trip_id(db: Session, trip_id: str) -> Optional[Trip]:
 
-        db_trip = db.query(TripModel).filter(TripModel.trip_id == trip_id).first()
+        db_trip = get_feed_repository(db).trips_by_id.get(trip_id)
         
         if db_trip:
             return TripService._model_to_schema(db_trip)
@@ -92,6 +94,8 @@ class TripService:
 
     @staticmethod
     def get_trip_shapes(db: Session, trip_id: str) -> Optional[TripShapesResponse]:
+        if settings.GTFS_PACKED_STORAGE:
+            return TripService._get_packed_trip_shapes(db, trip_id)
 
         # Get shape_id for this trip_id
         trip_shape = db.query(TripShapeModel).filter(
@@ -103,7 +107,7 @@ class TripService:
         
         # Get all shape points for this shape_id, ordered by sequence
         db_shapes = db.query(ShapeModel).filter(
-            ShapeModel.id == trip_shape.shape_id
+            ShapeModel.shape_key == key_of(ShapeKeyModel, trip_shape.shape_id)
         ).order_by(ShapeModel.sequence).all()
         
         points = [TripService._shape_point_model_to_schema(shape) for shape in db_shapes]
@@ -114,31 +118,62 @@ class TripService:
             points=points
         )
 
+    @staticmethod
+    def _get_packed_trip_shapes(db: Session, trip_id: str) -> Optional[TripShapesResponse]:
+        result = db.query(
+            TripShapeModel.shape_id,
+            PackedShapeModel.points
+        ).outerjoin(
+            ShapeKeyModel, ShapeKeyModel.id == TripShapeModel.shape_id
+        ).outerjoin(
+            PackedShapeModel, PackedShapeModel.shape_key == ShapeKeyModel.key
+        ).filter(
+            TripShapeModel.trip_id == trip_id
+        ).first()
+        
+        if not result:
+            return None
+        
+        shape_id, packed_points = result
+        points = [
+            ShapePoint(sequence=sequence, coordinates=Coordinates(latitude=lat, longitude=lon))
+            for sequence, lat, lon in unpack_shape_points(packed_points or b"")
+        ]
+        
+        return TripShapesResponse(
+            trip_id=trip_id,
+            shape_id=shape_id,
+            points=points
+        )
+
     @staticmethod
     def get_trip_stops(db: Session, trip_id: str) -> List[TripStop]:
-        db_trip = db.query(TripModel).filter(TripModel.trip_id == trip_id).first()
+        db_trip = get_feed_repository(db).trips_by_id.get(trip_id)
         if not db_trip:
             return []
         
         results = db.query(
-            TripStopModel,
+            StopVisitModel.stop_sequence,
+            StopModel.id,
             StopModel.name,
             StopModel.zone_id
         ).join(
-            StopModel, TripStopModel.stop_id == StopModel.id
+            StopKeyModel, StopKeyModel.key == StopVisitModel.stop_key
+        ).join(
+            StopModel, StopKeyModel.id == StopModel.id
         ).filter(
-            TripStopModel.trip_id == trip_id
-        ).order_by(TripStopModel.sequence).all()
+            StopVisitModel.trip_key == key_of(TripKeyModel, trip_id)
+        ).order_by(StopVisitModel.stop_sequence).all()
         
         return [
             TripStop(
-                trip_id=ts.trip_id,
+                trip_id=trip_id,
                 stop=TripStopStopInfo(
-                    id=ts.stop_id,
+                    id=stop_id,
                     name=stop_name,
                     zone_id=zone_id
                 ),
-                sequence=ts.sequence
+                sequence=sequence
             )
-            for ts, stop_name, zone_id in results
+            for sequence, stop_id, stop_name, zone_id in results
         ]
\ No newline at end of file
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.generate_gtfs_feed import generate_feed
+
+
+DEFAULT_SCALES = [1, 5, 20]
+DEFAULT_THRESHOLD = 0.15
+
+# Tables each populate step writes, used to count the rows it produced
+STEP_TABLES = {
+    "stop_times": ["stop_visits", "trip_keys", "stop_keys", "route_keys"],
+    "trips": ["trips", "trip_shapes", "route_directions"],
+    "shapes": ["shapes", "packed_shapes", "shape_keys"],
+    "stops": ["stops"],
+    "routes": ["routes"],
+    "service_days": ["service_days"],
+    "agency": ["agencies"],
+    "route_shapes": ["route_shapes"],
+    "route_stops": ["route_stops"],
+}
+
+# Prefix of the line a step subprocess reports its measurements on
+RESULT_MARKER = "BENCHMARK_RESULT "
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def run_step(name: str) -> None:
+    """
+    Run a single populate step in this process and report its measurements.
+
+    Every step runs in its own process (see benchmark_feed) so that the
+    peak RSS belongs to that step alone.
+    """
+    from sqlalchemy import text
+    from app.core.config import settings
+    from app.core.database import get_engine, use_database
+    from scripts.populate_stcp import STEPS
+
+    step = next(step for step in STEPS if step.name == name)
+    # Same connection settings as the staging database of a populate run
+    use_database(settings.DATABASE_URL, bulk_load=True)
+
+    start = perf_counter()
+    step.func()
+    seconds = perf_counter() - start
+
+    with get_engine().connect() as connection:
+        rows = sum(
+            connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in STEP_TABLES.get(name, [])
+        )
+
+    result = {
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rows": rows,
+        "rows_per_second": round(rows / seconds) if seconds > 0 else 0,
+    }
+    print(RESULT_MARKER + json.dumps(result))
+
+
+def _step_order() -> List[str]:
+    from scripts.populate_stcp import STEPS
+    from app.data_source.gtfs.scheduler import StepScheduler
+
+    return StepScheduler(STEPS, max_workers=1).order
+
+
+def ensure_feed(feeds_dir: Path, scale: float, seed: int) -> Path:
+    """Generate the feed for a scale once and reuse it on later runs."""
+    feed_dir = feeds_dir / f"stcp_{scale:g}x_seed{seed}"
+    marker = feed_dir / ".complete"
+    if not marker.exists():
+        print(f"Generating {scale:g}x feed in {feed_dir}...")
+        counts = generate_feed(feed_dir, scale=scale, seed=seed)
+        marker.write_text(json.dumps(counts))
+    return feed_dir
+
+
+def benchmark_feed(feed_dir: Path, database_dir: Path, verbose: bool = False) -> Dict[str, dict]:
+    database = database_dir / f"{feed_dir.name}.db"
+    database.unlink(missing_ok=True)
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{database}"
+    env["GTFS_DATA_DIR"] = str(feed_dir)
+    env["GTFS_INCREMENTAL_LOAD"] = "false"
+
+    results = {}
+    for name in _step_order():
+        process = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "_step", name],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if verbose or process.returncode != 0:
+            print(process.stdout, end="")
+            print(process.stderr, end="", file=sys.stderr)
+        if process.returncode != 0:
+            raise RuntimeError(f"Step {name} failed on {feed_dir.name}")
+
+        line = next(line for line in process.stdout.splitlines() if line.startswith(RESULT_MARKER))
+        results[name] = json.loads(line[len(RESULT_MARKER):])
+        print(
+            f"  {name:<14}{results[name]['seconds']:>9.2f}s"
+            f"{results[name]['peak_rss_mb']:>9.1f} MB"
+            f"{results[name]['rows_per_second']:>12,} rows/s"
+        )
+
+    results["total"] = {
+        "seconds": round(sum(result["seconds"] for result in results.values()), 3),
+        "peak_rss_mb": max(result["peak_rss_mb"] for result in results.values()),
+        "rows": sum(result["rows"] for result in results.values()),
+    }
+    results["total"]["rows_per_second"] = round(results["total"]["rows"] / results["total"]["seconds"])
+
+    database.unlink(missing_ok=True)
+    return results
+
+
+def run(scales: List[float], output: Path, feeds_dir: Path, seed: int, verbose: bool = False) -> dict:
+    baseline = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+        "results": {},
+    }
+
+    feeds_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as database_dir:
+        for scale in scales:
+            feed_dir = ensure_feed(feeds_dir, scale, seed)
+            print(f"Benchmarking {scale:g}x feed...")
+            baseline["results"][f"{scale:g}x"] = benchmark_feed(feed_dir, Path(database_dir), verbose)
+
+    output.write_text(json.dumps(baseline, indent=2))
+    print(f"\nResults written to {output}")
+    return baseline
+
+
+def compare(baseline_path: Path, current_path: Path, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Compare two result files and return the regressions: steps whose time
+    or peak RSS grew, or whose throughput dropped, by more than threshold.
+    """
+    baseline = json.loads(baseline_path.read_text())["results"]
+    current = json.loads(current_path.read_text())["results"]
+
+    regressions = []
+    print(f"{'Feed':<6}{'Step':<14}{'Time':>20}{'Peak RSS':>22}{'Rows/s':>26}")
+    for feed, steps in current.items():
+        for name, result in steps.items():
+            before = baseline.get(feed, {}).get(name)
+            if before is None:
+                continue
+
+            flags = []
+            if result["seconds"] > before["seconds"] * (1 + threshold):
+                flags.append("time")
+            if result["peak_rss_mb"] > before["peak_rss_mb"] * (1 + threshold):
+                flags.append("memory")
+            if result["rows_per_second"] < before["rows_per_second"] * (1 - threshold):
+                flags.append("throughput")
+
+            marker = f"  <- {', '.join(flags)}" if flags else ""
+            print(
+                f"{feed:<6}{name:<14}"
+                f"{before['seconds']:>9.2f}s ->{result['seconds']:>7.2f}s"
+                f"{before['peak_rss_mb']:>9.1f} ->{result['peak_rss_mb']:>7.1f} MB"
+                f"{before['rows_per_second']:>12,} ->{result['rows_per_second']:>11,}"
+                f"{marker}"
+            )
+            if flags:
+                regressions.append(f"{feed} {name}: {', '.join(flags)}")
+
+    print()
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {threshold:.0%}")
+    else:
+        print(f"No regressions over {threshold:.0%}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the populate steps on synthetic STCP feeds")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmark and write the results to a JSON file")
+    run_parser.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES, help="Feed sizes relative to the real feed (default: 1 5 20)")
+    run_parser.add_argument("--output", type=Path, default=Path("populate_benchmark.json"), help="Results file (default: populate_benchmark.json)")
+    run_parser.add_argument("--feeds-dir", type=Path, default=Path(tempfile.gettempdir()) / "stcp_benchmark_feeds", help="Where generated feeds are kept between runs")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--verbose", action="store_true", help="Show the output of every step")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline and flag regressions")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative change (default: 0.15)")
+
+    step_parser = subparsers.add_parser("_step")
+    step_parser.add_argument("name", choices=sorted(STEP_TABLES))
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args.scales, args.output, args.feeds_dir, args.seed, args.verbose)
+    elif args.command == "compare":
+        if compare(args.baseline, args.current, args.threshold):
+            sys.exit(1)
+    else:
+        run_step(args.name)
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import process_time
+from typing import List, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from app.main import app
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine, Base
+from app.api.utils.response_cache import response_cache
+from app.data_source.gtfs.repository import get_feed_repository
+from app.data_source.gtfs.stcp.models.bus import Bus as BusModel
+
+
+# Buses added for the run (and deleted afterwards) so /buses returns a full page
+SAMPLE_BUSES = 100
+SAMPLE_PREFIX = "benchmark-"
+
+ROUNDS = 5
+
+ENDPOINTS = [
+    ("GET /stops (all stops)", "/api/v1/stcp/stops/"),
+    ("GET /buses", "/api/v1/stcp/buses/"),
+    ("GET /stops/{unknown} (404)", "/api/v1/stcp/stops/benchmark-unknown"),
+]
+
+
+def add_sample_buses() -> None:
+    db = SessionLocal()
+    try:
+        trips = get_feed_repository(db).trips[:SAMPLE_BUSES]
+        for number, trip in enumerate(trips):
+            db.add(BusModel(
+                vehicle_id=f"{SAMPLE_PREFIX}{number}",
+                route_id=trip.route_id,
+                direction_id=trip.direction_id,
+                service_id=trip.service_id,
+                lat=41.15,
+                lon=-8.61,
+                last_updated=datetime.utcnow()
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def remove_sample_buses() -> None:
+    db = SessionLocal()
+    try:
+        db.query(BusModel).filter(BusModel.vehicle_id.like(f"{SAMPLE_PREFIX}%")).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def cpu_per_request(client: httpx.AsyncClient, url: str, requests: int) -> Tuple[float, int]:
+    """
+    Mean CPU time of a request in milliseconds, and the size of its body.
+
+    The response cache is cleared before every request, so cached endpoints
+    build their response each time (and compress it, which takes the same
+    time with and without the fast path).
+    """
+    headers = {"X-API-Key": settings.SECRET_KEY}
+    response_cache.clear()
+    response = await client.get(url, headers=headers)
+
+    started = process_time()
+    for _ in range(requests):
+        response_cache.clear()
+        response = await client.get(url, headers=headers)
+    return (process_time() - started) / requests * 1000, len(response.content)
+
+
+async def benchmark(requests: int) -> List[Tuple[str, float, float, int]]:
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, url in ENDPOINTS:
+            # Both modes run in alternating rounds, so drift over the run
+            # affects them alike
+            timings = {False: [], True: []}
+            for _ in range(ROUNDS):
+                for fast in (False, True):
+                    settings.FAST_JSON_RESPONSES = fast
+                    timings[fast].append(await cpu_per_request(client, url, max(1, requests // ROUNDS)))
+            default_ms = sum(ms for ms, _ in timings[False]) / ROUNDS
+            fast_ms = sum(ms for ms, _ in timings[True]) / ROUNDS
+            results.append((name, default_ms, fast_ms, timings[False][0][1]))
+    return results
+
+
+def benchmark_responses(requests: int) -> None:
+    Base.metadata.create_all(bind=get_engine())
+    fast_json_responses = settings.FAST_JSON_RESPONSES
+
+    add_sample_buses()
+    try:
+        results = asyncio.run(benchmark(requests))
+    finally:
+        settings.FAST_JSON_RESPONSES = fast_json_responses
+        remove_sample_buses()
+
+    print(f"CPU per request, mean of {requests} requests (FAST_JSON_RESPONSES off / on)")
+    print(f"{'Endpoint':<30}{'Bytes':>10}{'Default ms':>12}{'Fast ms':>10}{'Saved ms':>10}{'Saved':>8}")
+    for name, default_ms, fast_ms, size in results:
+        saved = default_ms - fast_ms
+        print(f"{name:<30}{size:>10}{default_ms:>12.2f}{fast_ms:>10.2f}{saved:>10.2f}{saved / default_ms:>8.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the CPU time per request of the list endpoints with and without FAST_JSON_RESPONSES"
+    )
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint and mode (default: 50)")
+    args = parser.parse_args()
+
+    benchmark_responses(args.requests)
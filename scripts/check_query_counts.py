@@ -0,0 +1,111 @@
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.repository import get_feed_repository
+from app.data_source.gtfs.stcp.models.bus import Bus as BusModel
+from app.services.bus_service import BusService
+from app.services.route_service import RouteService
+from app.services.service_day_service import ServiceDayService
+from app.services.stop_service import StopService
+from app.services.trip_service import TripService
+
+
+# Buses added (and rolled back) so the bus listing converts a full page
+SAMPLE_BUSES = 100
+
+
+def list_endpoint_cases(db: Session) -> List[Tuple[str, Callable[[], object], int]]:
+    """
+    (name, call, expected queries) for the service call behind every list
+    endpoint. The static feed is served from the feed repository, so only
+    the buses, which change every few seconds, are read from the database:
+    one query for the total and one for the page, however many rows it has.
+    """
+    feed = get_feed_repository(db)
+    route_id = feed.routes[0].id if feed.routes else ""
+    service_id = feed.service_days[0].service_id if feed.service_days else ""
+    zone_id = feed.stops[0].zone_id if feed.stops else ""
+
+    return [
+        ("GET /stops", lambda: StopService.get_stops(db, size=None), 0),
+        ("GET /stops?zone_id", lambda: StopService.get_stops(db, zone_id=zone_id), 0),
+        ("GET /routes", lambda: RouteService.get_routes(db), 0),
+        ("GET /routes?service_id", lambda: RouteService.get_routes(db, service_ids=[service_id]), 0),
+        ("GET /routes/{route_id}", lambda: RouteService.get_route_by_id(db, route_id), 0),
+        ("GET /trips", lambda: TripService.get_trips(db), 0),
+        ("GET /trips?route_id", lambda: TripService.get_trips(db, route_id=route_id, direction_id=0), 0),
+        ("GET /service-days", lambda: ServiceDayService.get_service_days(db), 0),
+        ("GET /buses", lambda: BusService.get_buses(db), 2),
+        ("GET /buses?route_id", lambda: BusService.get_buses(db, route_id=route_id), 2),
+    ]
+
+
+def add_sample_buses(db: Session) -> None:
+    """Flush buses running the first trips of the feed, without committing them."""
+    trips = get_feed_repository(db).trips[:SAMPLE_BUSES]
+    for number, trip in enumerate(trips):
+        db.add(BusModel(
+            vehicle_id=f"query-count-{number}",
+            route_id=trip.route_id,
+            direction_id=trip.direction_id,
+            service_id=trip.service_id,
+            lat=41.15,
+            lon=-8.61,
+            last_updated=datetime.utcnow()
+        ))
+    db.flush()
+
+
+def check_query_counts() -> List[str]:
+    Base.metadata.create_all(bind=get_engine())
+
+    db: Session = SessionLocal()
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    failures = []
+    try:
+        add_sample_buses(db)
+        cases = list_endpoint_cases(db)
+
+        event.listen(get_engine(), "before_cursor_execute", count_statement)
+        print(f"{'Endpoint':<26}{'Queries':>9}{'Expected':>10}")
+        for name, call, expected in cases:
+            statements.clear()
+            call()
+            marker = "" if len(statements) == expected else "  <- changed"
+            print(f"{name:<26}{len(statements):>9}{expected:>10}{marker}")
+            if marker:
+                failures.append(name)
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", count_statement)
+        db.rollback()
+        db.close()
+
+    print()
+    if failures:
+        print(f"{len(failures)} endpoint(s) no longer run the expected number of queries")
+    else:
+        print("Every list endpoint runs the expected number of queries")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that the list endpoints run a fixed number of queries, whatever the page size"
+    )
+    parser.parse_args()
+
+    if check_query_counts():
+        sys.exit(1)
@@ -1,50 +1,119 @@
+import hashlib
+import io
+import json
 import httpx
 import zipfile
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
 
-def download_gtfs(
-    url: str,
-    output_dir: Path,
-    timeout: float = 30.0,
-) -> None:
+GTFS_URL = (
+    "https://opendata.porto.digital/dataset/5275c986-592c-43f5-8f87-aabbd4e4f3a4/"
+    "resource/89a6854f-2ea3-4ba0-8d2f-6558a9df2a98/download/"
+    "horarios_gtfs_stcp_16_04_2025.zip"
+)
+
+# Written next to the extracted files to make the next download conditional
+DOWNLOAD_INFO_FILE = ".gtfs_download.json"
+
+
+@dataclass
+class GTFSDownload:
+    content: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    @property
+    def sha256(self) -> str:
+        return hashlib.sha256(self.content).hexdigest()
 
+
+def fetch_gtfs(
+    url: str = GTFS_URL,
+    timeout: float = 30.0,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Optional[GTFSDownload]:
+    """
+    Download the GTFS zip into memory.
+    
+    With the ETag and/or Last-Modified of a previous download the request is
+    conditional, and None is returned when the server reports the feed as
+    not modified.
+    """
+    
     print(f"Downloading GTFS file from: {url}")
     
-    # Download
-    with httpx.stream("GET", url, timeout=timeout, follow_redirects=True) as response:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    
+    buffer = io.BytesIO()
+    with httpx.stream("GET", url, headers=headers, timeout=timeout, follow_redirects=True) as response:
+        if response.status_code == 304:
+            print("GTFS feed not modified since the last download")
+            return None
         response.raise_for_status()
         
-        zip_path = output_dir / "gtfs_temp.zip"
-        
         print("Downloading...")
-        with open(zip_path, "wb") as f:
-            for chunk in response.iter_bytes():
-                f.write(chunk)
-            
-    # Extract zip
-    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-        zip_ref.extractall(output_dir)
+        for chunk in response.iter_bytes():
+            buffer.write(chunk)
     
-    # Remove zip
-    zip_path.unlink()
+    print(f"Downloaded {buffer.tell() / 1024 / 1024:.1f} MB")
+    return GTFSDownload(
+        content=buffer.getvalue(),
+        etag=response.headers.get("etag"),
+        last_modified=response.headers.get("last-modified"),
+    )
 
 
-if __name__ == "__main__":
-    GTFS_URL = (
-        "https://opendata.porto.digital/dataset/5275c986-592c-43f5-8f87-aabbd4e4f3a4/"
-        "resource/89a6854f-2ea3-4ba0-8d2f-6558a9df2a98/download/"
-        "horarios_gtfs_stcp_16_04_2025.zip"
-    )
+def download_gtfs(
+    url: str,
+    output_dir: Path,
+    timeout: float = 30.0,
+) -> bool:
+    """
+    Download and extract the feed into output_dir.
+    
+    Returns False, leaving the extracted files alone, when the server reports
+    the feed as not modified or the downloaded zip has the same content hash
+    as the previous one.
+    """
     
+    info_path = output_dir / DOWNLOAD_INFO_FILE
+    previous = json.loads(info_path.read_text()) if info_path.exists() else {}
+    
+    download = fetch_gtfs(url, timeout, previous.get("etag"), previous.get("last_modified"))
+    if download is None:
+        return False
+    
+    info = {"etag": download.etag, "last_modified": download.last_modified, "sha256": download.sha256}
+    changed = download.sha256 != previous.get("sha256")
+    
+    if changed:
+        # Extract zip
+        with zipfile.ZipFile(io.BytesIO(download.content), "r") as zip_ref:
+            zip_ref.extractall(output_dir)
+    else:
+        print("Downloaded feed is identical to the extracted one")
+    
+    info_path.write_text(json.dumps(info))
+    return changed
+
+
+if __name__ == "__main__":
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     output_dir = project_root / "data" / "raw" / "stcp"
     
     try:
-        download_gtfs(GTFS_URL, output_dir)
-        print(f"\nGTFS files downloaded and extracted to: {output_dir}")
+        if download_gtfs(GTFS_URL, output_dir):
+            print(f"\nGTFS files downloaded and extracted to: {output_dir}")
+        else:
+            print(f"\nGTFS files in {output_dir} are up to date")
     except httpx.HTTPError as e:
         print(f"Error downloading file: {e}")
         exit(1)
@@ -0,0 +1,211 @@
+import argparse
+import csv
+import random
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+from typing import List, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.data_source.gtfs.normalizer import GTFSNormalizer
+
+
+# Size of the real STCP feed (scale 1)
+ROUTES = 73
+STOPS = 2502
+TRIPS = 25181
+STOPS_PER_TRIP = (20, 40)
+SHAPE_POINTS = (150, 400)
+
+# service_id, weekday flags, share of the trips (close to the real feed)
+SERVICES = [
+    ("UTEIS", "1,1,1,1,1,0,0", 0.222),
+    ("SAB", "0,0,0,0,0,1,0", 0.150),
+    ("DOM", "0,0,0,0,0,0,1", 0.126),
+    ("UTEISFE", "1,1,1,1,1,0,0", 0.213),
+    ("SABFE", "0,0,0,0,0,1,0", 0.150),
+    ("DOMFE", "0,0,0,0,0,0,1", 0.126),
+    ("ELECUTEIS", "1,1,1,1,1,0,0", 0.0043),
+    ("ELECSAB", "0,0,0,0,0,1,0", 0.0043),
+    ("ELECDOM", "0,0,0,0,0,0,1", 0.0044),
+]
+
+ZONES = ["PRT1", "PRT2", "PRT3", "MAI4", "GDM3", "VNG2", "MTS3", "VLG4"]
+
+# Bounding box around Porto
+LAT = (41.10, 41.25)
+LON = (-8.70, -8.50)
+
+
+def _writer(output_dir: Path, filename: str, header: List[str]):
+    f = open(output_dir / filename, "w", encoding="utf-8", newline="")
+    writer = csv.writer(f)
+    writer.writerow(header)
+    return f, writer
+
+
+def _route_ids(count: int) -> List[str]:
+    # Day lines are numbered from 200, every eighth line is a night line ("1M", "2M", ...)
+    route_ids = []
+    day = 200
+    night = 1
+    for index in range(count):
+        if index % 8 == 7:
+            route_ids.append(f"{night}M")
+            night += 1
+        else:
+            route_ids.append(str(day))
+            day += 1
+    return route_ids
+
+
+def _stop_code(index: int) -> str:
+    letters = ""
+    value = index // 4
+    for _ in range(4):
+        letters = chr(ord("A") + value % 26) + letters
+        value //= 26
+    return f"{letters}{index % 4 + 1}"
+
+
+def _format_time(seconds: int) -> str:
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def generate_feed(output_dir: Path, scale: float = 1.0, seed: int = 1) -> dict:
+    """
+    Write an STCP-shaped GTFS feed with `scale` times the routes, stops,
+    trips and shapes of the real feed. Returns the number of rows per file.
+    """
+    rng = random.Random(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+
+    f, writer = _writer(output_dir, "agency.txt", ["agency_id", "agency_name", "agency_url", "agency_timezone", "agency_lang"])
+    with f:
+        writer.writerow(["STCP", "Sociedade Transportes Colectivos do Porto", "http://www.stcp.pt", "Europe/Lisbon", "pt"])
+    counts["agency.txt"] = 1
+
+    f, writer = _writer(output_dir, "calendar.txt", ["service_id", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday", "start_date", "end_date"])
+    with f:
+        for service_id, days, _ in SERVICES:
+            writer.writerow([service_id, *days.split(","), "20250422", "20251231"])
+    counts["calendar.txt"] = len(SERVICES)
+
+    stop_count = max(1, round(STOPS * scale))
+    stops: List[Tuple[str, str]] = []
+    f, writer = _writer(output_dir, "stops.txt", ["stop_id", "stop_code", "stop_name", "stop_lat", "stop_lon", "zone_id", "stop_url"])
+    with f:
+        for index in range(stop_count):
+            code = _stop_code(index)
+            name = f"PARAGEM {index // 4 + 1}"
+            stops.append((code, name))
+            writer.writerow([
+                code,
+                code,
+                name,
+                f"{rng.uniform(*LAT):.13f}",
+                f"{rng.uniform(*LON):.14f}",
+                rng.choice(ZONES),
+                f"http://www.stcp.pt/pt/viajar/paragens/?t=detalhe&paragem={code}",
+            ])
+    counts["stops.txt"] = stop_count
+
+    route_ids = _route_ids(max(1, round(ROUTES * scale)))
+    f, writer = _writer(output_dir, "routes.txt", ["route_id", "route_short_name", "route_long_name", "route_desc", "route_type", "route_url", "route_color", "route_text_color"])
+    with f:
+        for route_id in route_ids:
+            first, last = rng.sample(stops, 2)
+            color = "1A1A1A" if route_id.endswith("M") else "187EC2"
+            writer.writerow([
+                route_id,
+                route_id,
+                f"{first[1].title()} - {last[1].title()}",
+                "",
+                3,
+                f"http://www.stcp.pt/pt/viajar/linhas/?linha={route_id}",
+                color,
+                "FFFFFF",
+            ])
+    counts["routes.txt"] = len(route_ids)
+
+    # Every route+direction has one shape and one stop pattern shared by its trips
+    patterns = {}
+    shape_rows = 0
+    f, writer = _writer(output_dir, "shapes.txt", ["shape_id", "shape_pt_lat", "shape_pt_lon", "shape_pt_sequence"])
+    with f:
+        for route_id in route_ids:
+            for direction_id in (0, 1):
+                shape_id = f"{route_id}_{direction_id}_1_shp"
+                patterns[(route_id, direction_id)] = (shape_id, rng.sample(stops, rng.randint(*STOPS_PER_TRIP)))
+
+                lat, lon = rng.uniform(*LAT), rng.uniform(*LON)
+                for sequence in range(1, rng.randint(*SHAPE_POINTS) + 1):
+                    lat += rng.uniform(-0.0005, 0.0005)
+                    lon += rng.uniform(-0.0005, 0.0005)
+                    writer.writerow([shape_id, f"{lat:.6f}", f"{lon:.6f}", sequence])
+                    shape_rows += 1
+    counts["shapes.txt"] = shape_rows
+
+    trip_count = max(1, round(TRIPS * scale))
+    service_ids = [service_id for service_id, _, _ in SERVICES]
+    weights = [share for _, _, share in SERVICES]
+    trip_numbers = {}
+    stop_time_rows = 0
+
+    trips_file, trips_writer = _writer(output_dir, "trips.txt", ["route_id", "direction_id", "service_id", "trip_id", "trip_headsign", "wheelchair_accessible", "block_id", "shape_id"])
+    stop_times_file, stop_times_writer = _writer(output_dir, "stop_times.txt", ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"])
+    with trips_file, stop_times_file:
+        keys = list(patterns)
+        for index in range(trip_count):
+            route_id, direction_id = keys[index % len(keys)]
+            service_id = rng.choices(service_ids, weights)[0]
+            service_code = GTFSNormalizer.SERVICE_MAPPING[service_id][0]
+            shape_id, pattern = patterns[(route_id, direction_id)]
+
+            trip_number = trip_numbers.get(route_id, 0) + 1
+            trip_numbers[route_id] = trip_number
+            trip_id = f"{route_id}_{direction_id}_{service_code}_{trip_number}"
+
+            trips_writer.writerow([route_id, direction_id, service_id, trip_id, pattern[-1][1].title(), 1, "", shape_id])
+
+            # Service runs from 05:30 to past midnight (GTFS times above 24:00:00)
+            seconds = rng.randint(5 * 3600 + 1800, 25 * 3600)
+            for sequence, (stop_id, _) in enumerate(pattern, 1):
+                departure = _format_time(seconds)
+                stop_times_writer.writerow([trip_id, departure, departure, stop_id, sequence])
+                seconds += rng.randint(60, 150)
+            stop_time_rows += len(pattern)
+    counts["trips.txt"] = trip_count
+    counts["stop_times.txt"] = stop_time_rows
+
+    return counts
+
+
+def zip_feed(feed_dir: Path, zip_path: Path) -> None:
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for path in sorted(feed_dir.glob("*.txt")):
+            zip_file.write(path, path.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic STCP-shaped GTFS feed")
+    parser.add_argument("output", type=Path, help="Directory to write the .txt files to (or .zip file with --zip)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size relative to the real STCP feed (default: 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, the same seed and scale give the same feed")
+    parser.add_argument("--zip", action="store_true", help="Write a zip file instead of a directory")
+    args = parser.parse_args()
+
+    feed_dir = args.output.with_suffix("") if args.zip else args.output
+    counts = generate_feed(feed_dir, scale=args.scale, seed=args.seed)
+
+    if args.zip:
+        zip_feed(feed_dir, args.output)
+        shutil.rmtree(feed_dir)
+
+    for filename, count in counts.items():
+        print(f"{filename:<16}{count:>12,} rows")
+    print(f"\nGenerated {args.scale:g}x STCP feed at {args.output}")
@@ -1,50 +1,56 @@
+import argparse
 import sys
 from pathlib import Path
+from typing import Optional
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal, get_engine, Base
 from app.core.config import settings
-from app.data_source.gtfs.loader import GTFSLoader
+from app.data_source.gtfs.feed_version import current_feed_version, record_feed_version
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source, set_feed_source
+from app.data_source.gtfs.normalizer import GTFSNormalizer
+from app.data_source.gtfs.scheduler import Step, StepScheduler
+from app.data_source.gtfs.staging import StagingDatabase
+from app.data_source.gtfs.writer import create_writer, is_incremental, set_incremental
 from app.data_source.gtfs.stcp.models.agency import Agency
+from scripts.download_gtfs import GTFS_URL, GTFSDownload, fetch_gtfs
 from scripts.populate_stcp_stops import load_stops
 from scripts.populate_stcp_service_days import load_service_days
-from scripts.populate_stcp_routes import load_all as load_routes_all
-from scripts.populate_stcp_trips import load_trips
+from scripts.populate_stcp_routes import load_routes, route_directions_writer, insert_route_directions
+from scripts.populate_stcp_trips import trips_writer, insert_trips
 from scripts.populate_stcp_shapes import load_shapes
-from scripts.populate_stcp_trip_shapes import load_trip_shapes
+from scripts.populate_stcp_trip_shapes import trip_shapes_writer, insert_trip_shapes
 from scripts.populate_stcp_route_shapes import load_route_shapes
 from scripts.populate_stcp_route_stops import load_route_stops
-from scripts.populate_stcp_trip_stops import load_trip_stops
-from scripts.populate_stcp_scheduled_arrivals import load_scheduled_arrivals
+from scripts.populate_stcp_stop_visits import load_stop_visits
 
 
 def load_agency():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
+    loader = GTFSLoader(get_feed_source())
     
-    print(f"Loading agency from {settings.GTFS_DATA_DIR}/agency.txt...")
+    print(f"Loading agency from {loader.file_location('agency.txt')}...")
     agencies_data = loader.load_agency()
     
     db: Session = SessionLocal()
     try:
+        writer = create_writer(db, Agency.__table__, ("id", "name", "url"))
+        
         # Clear old data
-        db.query(Agency).delete()
+        writer.clear()
         
         agency_data = agencies_data[0]
-        db_agency = Agency(
-            id=agency_data["id"],
-            name=agency_data["name"],
-            url=agency_data["url"]
-        )
-        
-        db.add(db_agency)
+        writer.write([(agency_data["id"], agency_data["name"], agency_data["url"])])
+        writer.finish()
         db.commit()
         
         print(f"Successfully loaded agency into database")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading agency: {e}")
         db.rollback()
@@ -53,75 +59,173 @@ def load_agency():
         db.close()
 
 
-def populate_all():
-    print("=" * 60)
-    print("Starting STCP GTFS data population")
-    print("=" * 60)
-    print()
+def load_trip_tables():
+    """
+    Read trips.txt once and fan every chunk out to the trips, trip_shapes
+    and route_directions tables.
+    """
+    Base.metadata.create_all(bind=get_engine())
+    
+    loader = GTFSLoader(get_feed_source())
     
+    print(f"Loading trips from {loader.file_location('trips.txt')}...")
+    
+    db: Session = SessionLocal()
     try:
-        steps = 11
+        trips = trips_writer(db)
+        trip_shapes = trip_shapes_writer(db)
+        route_directions = route_directions_writer(db)
         
-        # Agency
-        print(f"Step 1/{steps}: Loading agencies...")
-        load_agency()
-        print()
+        # Clear old data
+        trips.clear()
+        trip_shapes.clear()
+        route_directions.clear()
         
-        # Stops
-        print(f"Step 2/{steps}: Loading stops...")
-        load_stops()
-        print()
+        seen_directions = set()
         
-        # Service days
-        print(f"Step 3/{steps}: Loading service days...")
-        load_service_days()
-        print()
+        for raw_chunk in loader.iter_csv_chunks("trips.txt"):
+            insert_trips(trips, GTFSNormalizer.normalize_trips_for_table(raw_chunk))
+            insert_trip_shapes(trip_shapes, GTFSNormalizer.normalize_trip_shapes(raw_chunk))
+            insert_route_directions(route_directions, GTFSNormalizer.normalize_trips(raw_chunk), seen_directions)
         
-        # Routes
-        print(f"Step 4/{steps}: Loading routes and directions...")
-        load_routes_all()
-        print()
+        trips.finish()
+        trip_shapes.finish()
+        route_directions.finish()
+        db.commit()
         
-        # Shapes
-        print(f"Step 5/{steps}: Loading shapes...")
-        load_shapes()
-        print()
+        print(f"Successfully loaded {trips.rows_written} trips into database ({trips.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(trips.changes)
+        print(f"Successfully loaded {trip_shapes.rows_written} trip-shape relationships into database ({trip_shapes.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(trip_shapes.changes)
+        print(f"Successfully loaded {route_directions.rows_written} route directions into database ({route_directions.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(route_directions.changes)
+    except Exception as e:
+        print(f"Error loading trips: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# Independent files are parsed concurrently; only the derived tables have to
+# wait for the tables they are built from. Stop visits copy their trip's
+# columns from the trips table rather than parsing trips.txt a second time.
+# Ready steps are submitted in list order, so the largest files come first.
+STEPS = [
+    Step("trips", load_trip_tables),
+    Step("stop_times", load_stop_visits, depends_on=("trips",)),
+    Step("shapes", load_shapes),
+    Step("stops", load_stops),
+    Step("routes", load_routes),
+    Step("service_days", load_service_days),
+    Step("agency", load_agency),
+    Step("route_shapes", load_route_shapes, depends_on=("trips",)),
+    Step("route_stops", load_route_stops, depends_on=("stop_times",)),
+]
+
+
+def get_current_feed_version():
+    db: Session = SessionLocal()
+    try:
+        return current_feed_version(db)
+    finally:
+        db.close()
+
+
+def skip_unchanged_feed(fingerprint: str, download: Optional[GTFSDownload]) -> bool:
+    """
+    True when the database already holds the feed with this fingerprint.
+    
+    The ETag/Last-Modified of a new download of the same feed are stored on
+    the current version, so the next download can be conditional again.
+    """
+    db: Session = SessionLocal()
+    try:
+        current = current_feed_version(db)
+        if current is None or current.fingerprint != fingerprint:
+            return False
         
-        # Trips
-        print(f"Step 6/{steps}: Loading trips...")
-        load_trips()
-        print()
+        if download is not None:
+            current.etag = download.etag
+            current.last_modified = download.last_modified
+            db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def populate_all(
+    max_workers: Optional[int] = None,
+    force: bool = False,
+    download: Optional[GTFSDownload] = None,
+) -> bool:
+    """
+    Populate every table from the current feed source.
+    
+    Returns False without touching the database when it already holds a feed
+    with the same fingerprint, unless force is set.
+    """
+    print("=" * 60)
+    print("Starting STCP GTFS data population")
+    print("=" * 60)
+    print()
+    
+    fingerprint = GTFSLoader(get_feed_source()).fingerprint()
+    if not force and skip_unchanged_feed(fingerprint, download):
+        print(f"Feed {fingerprint[:12]} is already loaded, skipping population (use --force to reload)")
+        return False
+    
+    # Build into a staging database and swap it in at the end, so the API
+    # keeps serving the previous feed until the new one is complete
+    staging = StagingDatabase()
+    
+    try:
+        # Tables are created once up front so the workers never race on DDL
+        staging.prepare(copy_live=is_incremental())
+        print(f"Building the new feed in {staging.path or staging.schema}")
         
-        # Trip shapes
-        print(f"Step 7/{steps}: Loading trip shapes...")
-        load_trip_shapes()
+        scheduler = StepScheduler(
+            STEPS,
+            max_workers=max_workers,
+            database_url=staging.url,
+            database_schema=staging.schema,
+            bulk_load=True,
+        )
+        print(f"Running {len(STEPS)} steps with {scheduler.max_workers} worker(s)...")
         print()
         
-        # Route shapes
-        print(f"Step 8/{steps}: Loading route shapes...")
-        load_route_shapes()
-        print()
+        scheduler.run()
         
-        # Route stops
-        print(f"Step 9/{steps}: Loading route stops...")
-        load_route_stops()
         print()
-        
-        # Trip stops
-        print(f"Step 10/{steps}: Loading trip stops...")
-        load_trip_stops()
+        print(scheduler.report())
         print()
         
-        # Scheduled arrivals
-        print(f"Step 11/{steps}: Loading scheduled arrivals...")
-        load_scheduled_arrivals()
-        print()
+        # Recorded in the staging database, so the version swaps in with the data
+        db: Session = SessionLocal()
+        try:
+            record_feed_version(
+                db,
+                fingerprint,
+                etag=download.etag if download else None,
+                last_modified=download.last_modified if download else None,
+            )
+            db.commit()
+        finally:
+            db.close()
         
+        staging.promote()
+        print("Switched the live database to the new feed")
+        print()
         print("=" * 60)
         print("✓ All STCP GTFS data successfully populated!")
         print("=" * 60)
+        return True
         
     except Exception as e:
+        staging.discard()
         print()
         print("=" * 60)
         print(f"✗ Error during population: {e}")
@@ -130,4 +234,50 @@ def populate_all():
 
 
 if __name__ == "__main__":
-    populate_all()
+    parser = argparse.ArgumentParser(description="Populate the database from the STCP GTFS feed")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (defaults to the number of CPUs, 1 runs the steps one at a time)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=settings.GTFS_INCREMENTAL_LOAD,
+        help="Only apply rows that changed since the previous load (also set by GTFS_INCREMENTAL_LOAD)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Populate even if the database already holds the same feed",
+    )
+    parser.add_argument(
+        "--download",
+        nargs="?",
+        const=GTFS_URL,
+        default=None,
+        metavar="URL",
+        help="Download the GTFS zip (from the STCP feed by default) and load it from memory instead of GTFS_DATA_DIR",
+    )
+    args = parser.parse_args()
+    
+    set_incremental(args.incremental)
+    
+    download = None
+    if args.download:
+        # Conditional on the ETag/Last-Modified of the feed the database holds
+        current = None if args.force else get_current_feed_version()
+        download = fetch_gtfs(
+            args.download,
+            etag=current.etag if current else None,
+            last_modified=current.last_modified if current else None,
+        )
+        if download is None:
+            print("Database already holds the latest feed, skipping population")
+            sys.exit(0)
+        
+        # The zip is read member by member straight from memory, nothing is written to disk
+        set_feed_source(download.content)
+    
+    populate_all(max_workers=args.workers, force=args.force, download=download)
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.keys import KeyDictionary
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.packed import ShapePointsPacker
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
+from app.data_source.gtfs.stcp.models.packed_shape import PackedShape
+from app.data_source.gtfs.stcp.models.shape_key import ShapeKey
+
+
+def packed_shapes_writer(db: Session) -> BulkWriter:
+    return create_writer(db, PackedShape.__table__, ("shape_key", "points"))
+
+
+def insert_packed_shapes(writer: BulkWriter, packer: ShapePointsPacker) -> int:
+    return writer.write(packer.rows())
+
+
+def load_packed_shapes():
+    Base.metadata.create_all(bind=get_engine())
+    
+    loader = GTFSLoader(get_feed_source())
+    
+    print(f"Loading shapes from {loader.file_location('shapes.txt')}...")
+    
+    db: Session = SessionLocal()
+    try:
+        writer = packed_shapes_writer(db)
+        shape_keys = KeyDictionary(db, ShapeKey.__table__)
+        
+        # Clear old data
+        writer.clear()
+        
+        packer = ShapePointsPacker()
+        for shapes in loader.iter_shape_columns():
+            packer.add(shapes, shape_keys.keys(shapes.id))
+        
+        insert_packed_shapes(writer, packer)
+        writer.finish()
+        shape_keys.write()
+        db.commit()
+        
+        print(f"Successfully loaded {writer.rows_written} packed shapes into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
+    except Exception as e:
+        print(f"Error loading packed shapes: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    load_packed_shapes()
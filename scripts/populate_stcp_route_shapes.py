@@ -4,59 +4,47 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.writer import create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.route_shape import RouteShape
 from app.data_source.gtfs.stcp.models.trip import Trip as TripModel
 from app.data_source.gtfs.stcp.models.trip_shape import TripShape as TripShapeModel
 
 
 def load_route_shapes():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
     print("Loading route_shapes from trips and trip_shapes tables...")
     
     db: Session = SessionLocal()
     try:
-        # Clear old data
-        db.query(RouteShape).delete()
-        
-        # Get all unique route_id + direction_id combinations
-        route_directions = db.query(
-            TripModel.route_id,
-            TripModel.direction_id
-        ).distinct().all()
+        writer = create_writer(db, RouteShape.__table__, ("route_id", "direction_id", "shape_id"))
         
-        route_shapes_list = []
+        # Clear old data
+        writer.clear()
         
-        for route_id, direction_id in route_directions:
-            # Get all trips for route+direction
-            trips = db.query(TripModel.trip_id).filter(
-                TripModel.route_id == route_id,
-                TripModel.direction_id == direction_id
-            ).all()
-            
-            if not trips:
-                continue
-            
-            trip_ids = [trip.trip_id for trip in trips]
-            
-            # Get the shape_id for these trips (should be the same for all trips in same route+direction)
-            trip_shape = db.query(TripShapeModel.shape_id).filter(
-                TripShapeModel.trip_id.in_(trip_ids)
-            ).first()
-            
-            if trip_shape:
-                route_shapes_list.append(RouteShape(
-                    route_id=route_id,
-                    direction_id=direction_id,
-                    shape_id=trip_shape.shape_id
-                ))
+        # One grouped query over every trip instead of a query per route+direction.
+        # All trips of a route+direction should share a shape; MIN keeps the
+        # choice deterministic when they do not.
+        route_shapes = db.execute(
+            select(
+                TripModel.route_id,
+                TripModel.direction_id,
+                func.min(TripShapeModel.shape_id),
+            )
+            .join(TripShapeModel, TripShapeModel.trip_id == TripModel.trip_id)
+            .group_by(TripModel.route_id, TripModel.direction_id)
+        ).all()
         
-        db.bulk_save_objects(route_shapes_list)
+        writer.write(tuple(row) for row in route_shapes)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(route_shapes_list)} route-shape relationships into database")
+        print(f"Successfully loaded {writer.rows_written} route-shape relationships into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading route_shapes: {e}")
         db.rollback()
@@ -4,71 +4,59 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.writer import create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.route_stop import RouteStop
-from app.data_source.gtfs.stcp.models.trip import Trip as TripModel
-from app.data_source.gtfs.stcp.models.trip_stop import TripStop as TripStopModel
+from app.data_source.gtfs.stcp.models.route_key import RouteKey
+from app.data_source.gtfs.stcp.models.stop_key import StopKey
+from app.data_source.gtfs.stcp.models.stop_visit import StopVisit as StopVisitModel
 
 
 def load_route_stops():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    print("Loading route_stops from trips and trip_stops tables...")
+    print("Loading route_stops from stop_visits table...")
     
     db: Session = SessionLocal()
     try:
-        # Clear old data
-        db.query(RouteStop).delete()
-        
-        # Get all unique route_id + direction_id combinations
-        route_directions = db.query(
-            TripModel.route_id,
-            TripModel.direction_id
-        ).distinct().all()
+        writer = create_writer(db, RouteStop.__table__, ("route_id", "direction_id", "stop_id", "stop_sequence"))
         
-        route_stops_list = []
+        # Clear old data
+        writer.clear()
         
-        for route_id, direction_id in route_directions:
-            # Get all trips for this route+direction
-            trips = db.query(TripModel.trip_id).filter(
-                TripModel.route_id == route_id,
-                TripModel.direction_id == direction_id
-            ).all()
-            
-            if not trips:
-                continue
-            
-            trip_ids = [trip.trip_id for trip in trips]
-            
-            # Get unique stop_ids with their sequences for these trips
-            # sequence is the same for same route+direction+stop
-            trip_stops = db.query(
-                TripStopModel.stop_id,
-                TripStopModel.sequence
-            ).filter(
-                TripStopModel.trip_id.in_(trip_ids)
-            ).distinct().all()
-            
-            # Group by stop_id and take the first sequence
-            stop_sequences = {}
-            for stop_id, sequence in trip_stops:
-                if stop_id not in stop_sequences:
-                    stop_sequences[stop_id] = sequence
-            
-            # Add route_stop entries for each unique stop with its sequence
-            for stop_id, sequence in stop_sequences.items():
-                route_stops_list.append(RouteStop(
-                    route_id=route_id,
-                    direction_id=direction_id,
-                    stop_id=stop_id,
-                    stop_sequence=sequence
-                ))
+        # One grouped query over every stop visit instead of a query per
+        # route+direction. stop_visits carries the route and direction of
+        # each visit, so no join with trips is needed. The sequence is the
+        # same for the same route+direction+stop; MIN picks the first visit
+        # on routes that pass the same stop twice. The keys are translated
+        # back to the route and stop ids through their dictionary tables,
+        # and the groups are by those ids (one per key), since PostgreSQL
+        # only selects columns the rows are grouped by.
+        route_stops = db.execute(
+            select(
+                RouteKey.id,
+                StopVisitModel.direction_id,
+                StopKey.id,
+                func.min(StopVisitModel.stop_sequence),
+            )
+            .join(RouteKey, RouteKey.key == StopVisitModel.route_key)
+            .join(StopKey, StopKey.key == StopVisitModel.stop_key)
+            .group_by(
+                RouteKey.id,
+                StopVisitModel.direction_id,
+                StopKey.id,
+            )
+        ).all()
         
-        db.bulk_save_objects(route_stops_list)
+        writer.write(tuple(row) for row in route_stops)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(route_stops_list)} route-stop relationships into database")
+        print(f"Successfully loaded {writer.rows_written} route-stop relationships into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading route_stops: {e}")
         db.rollback()
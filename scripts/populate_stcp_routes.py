@@ -1,46 +1,63 @@
 import sys
 from pathlib import Path
+from typing import List, Dict, Any, Set, Tuple
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
-from app.core.config import settings
-from app.data_source.gtfs.loader import GTFSLoader
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.route import Route
 from app.data_source.gtfs.stcp.models.route_direction import RouteDirection
 
 
+def routes_writer(db: Session) -> BulkWriter:
+    return create_writer(
+        db,
+        Route.__table__,
+        ("id", "short_name", "long_name", "type", "route_color", "route_text_color"),
+    )
+
+
+def insert_routes(writer: BulkWriter, routes_chunk: List[Dict[str, Any]]) -> int:
+    return writer.write(
+        (
+            route["id"],
+            route["short_name"],
+            route["long_name"],
+            route["type"],
+            route["route_color"],
+            route["route_text_color"],
+        )
+        for route in routes_chunk
+    )
+
+
 def load_routes():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
+    loader = GTFSLoader(get_feed_source())
     
-    print(f"Loading routes from {settings.GTFS_DATA_DIR}/routes.txt...")
-    routes_data = loader.load_routes()
+    print(f"Loading routes from {loader.file_location('routes.txt')}...")
     
     db: Session = SessionLocal()
     try:
+        writer = routes_writer(db)
+        
         # Clear old data
-        db.query(Route).delete()
+        writer.clear()
         
-        db_routes = [
-            Route(
-                id=route["id"],
-                short_name=route["short_name"],
-                long_name=route["long_name"],
-                type=route["type"],
-                route_color=route["route_color"],
-                route_text_color=route["route_text_color"]
-            )
-            for route in routes_data
-        ]
+        for routes_chunk in loader.iter_routes():
+            insert_routes(writer, routes_chunk)
         
-        db.bulk_save_objects(db_routes)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(db_routes)} routes into database")
+        print(f"Successfully loaded {writer.rows_written} routes into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading routes: {e}")
         db.rollback()
@@ -49,41 +66,46 @@ def load_routes():
         db.close()
 
 
-def load_route_directions():
-    Base.metadata.create_all(bind=engine)
-    
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
-    
-    print(f"Loading trips from {settings.GTFS_DATA_DIR}/trips.txt...")
-    trips_data = loader.load_trips()
-    
-    seen = set()
+def route_directions_writer(db: Session) -> BulkWriter:
+    return create_writer(db, RouteDirection.__table__, ("route_id", "direction_id", "service_id", "headsign"))
+
+
+def insert_route_directions(writer: BulkWriter, trips_chunk: List[Dict[str, Any]], seen: Set[Tuple[str, int, str]]) -> int:
+    # seen is shared across chunks so each (route, direction, service) is inserted once
     unique_directions = []
-    for trip in trips_data:
+    for trip in trips_chunk:
         key = (trip["route_id"], trip["direction_id"], trip["service_id"])
         if key not in seen:
             seen.add(key)
-            unique_directions.append(trip)
+            unique_directions.append(key + (trip["headsign"],))
+    
+    return writer.write(unique_directions)
+
+
+def load_route_directions():
+    Base.metadata.create_all(bind=get_engine())
+    
+    loader = GTFSLoader(get_feed_source())
+    
+    print(f"Loading trips from {loader.file_location('trips.txt')}...")
     
     db: Session = SessionLocal()
     try:
+        writer = route_directions_writer(db)
+        
         # Clear old data
-        db.query(RouteDirection).delete()
+        writer.clear()
         
-        db_route_directions = [
-            RouteDirection(
-                route_id=rd["route_id"],
-                direction_id=rd["direction_id"],
-                service_id=rd["service_id"],
-                headsign=rd["headsign"]
-            )
-            for rd in unique_directions
-        ]
+        seen = set()
+        for trips_chunk in loader.iter_trips():
+            insert_route_directions(writer, trips_chunk, seen)
         
-        db.bulk_save_objects(db_route_directions)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(db_route_directions)} route directions into database")
+        print(f"Successfully loaded {writer.rows_written} route directions into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
         print("\n")
     except Exception as e:
         print(f"Error loading route directions: {e}")
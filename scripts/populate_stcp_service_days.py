@@ -1,46 +1,56 @@
 import sys
 from pathlib import Path
+from typing import List, Dict, Any
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
-from app.core.config import settings
-from app.data_source.gtfs.loader import GTFSLoader
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.service_day import ServiceDay
 
 
+def service_days_writer(db: Session) -> BulkWriter:
+    return create_writer(
+        db,
+        ServiceDay.__table__,
+        ("service_id", "service_name", "service_type", "day_map", "start_date", "end_date"),
+    )
+
+
+def insert_service_days(writer: BulkWriter, service_days_chunk: List[Dict[str, Any]]) -> int:
+    return writer.write(
+        (sd["service_id"], sd["service_name"], sd["service_type"], sd["day_map"], sd["start_date"], sd["end_date"])
+        for sd in service_days_chunk
+    )
+
+
 def load_service_days():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
+    loader = GTFSLoader(get_feed_source())
     
-    print(f"Loading service days from {settings.GTFS_DATA_DIR}/calendar.txt...")
-    service_days_data = loader.load_calendar()
+    print(f"Loading service days from {loader.file_location('calendar.txt')}...")
     
     db: Session = SessionLocal()
     try:
+        writer = service_days_writer(db)
+        
         # Clear old data and commit separately to ensure it's executed
-        db.query(ServiceDay).delete()
+        writer.clear()
         db.commit()
         
-        db_service_days = [
-            ServiceDay(
-                service_id=sd["service_id"],
-                service_name=sd["service_name"],
-                service_type=sd["service_type"],
-                day_map=sd["day_map"],
-                start_date=sd["start_date"],
-                end_date=sd["end_date"]
-            )
-            for sd in service_days_data
-        ]
+        for service_days_chunk in loader.iter_calendar():
+            insert_service_days(writer, service_days_chunk)
         
-        db.bulk_save_objects(db_service_days)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(db_service_days)} service days into database")
+        print(f"Successfully loaded {writer.rows_written} service days into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading service days: {e}")
         db.rollback()
@@ -50,4 +60,4 @@ def load_service_days():
 
 
 if __name__ == "__main__":
-    load_service_days()
\ No newline at end of file
+    load_service_days()
@@ -1,43 +1,73 @@
 import sys
 from pathlib import Path
+from typing import Sequence
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
 from app.core.config import settings
-from app.data_source.gtfs.loader import GTFSLoader
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.keys import KeyDictionary
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.normalizer import ShapeColumns
+from app.data_source.gtfs.packed import ShapePointsPacker
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.shape import Shape
+from app.data_source.gtfs.stcp.models.shape_key import ShapeKey
+from scripts.populate_stcp_packed_shapes import packed_shapes_writer, insert_packed_shapes
+
+
+def shapes_writer(db: Session) -> BulkWriter:
+    return create_writer(db, Shape.__table__, ("shape_key", "sequence", "lat", "lon"))
+
+
+def insert_shapes(writer: BulkWriter, shapes: ShapeColumns, shape_keys: Sequence[int]) -> int:
+    return writer.write(zip(shape_keys, shapes.sequence, shapes.lat, shapes.lon))
 
 
 def load_shapes():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
+    loader = GTFSLoader(get_feed_source())
     
-    print(f"Loading shapes from {settings.GTFS_DATA_DIR}/shapes.txt...")
-    shapes_data = loader.load_shapes()
+    print(f"Loading shapes from {loader.file_location('shapes.txt')}...")
     
     db: Session = SessionLocal()
     try:
-        # Clear old data
-        db.query(Shape).delete()
+        writer = shapes_writer(db)
+        packed_writer = packed_shapes_writer(db)
+        shape_keys = KeyDictionary(db, ShapeKey.__table__)
+        
+        # Clear old data (of both layouts, only the configured one is written)
+        writer.clear()
+        packed_writer.clear()
+        
+        packer = ShapePointsPacker() if settings.GTFS_PACKED_STORAGE else None
+        
+        for shapes in loader.iter_shape_columns():
+            keys = shape_keys.keys(shapes.id)
+            if packer is None:
+                insert_shapes(writer, shapes, keys)
+            else:
+                packer.add(shapes, keys)
         
-        db_shapes = [
-            Shape(
-                id=shape["id"],
-                lat=shape["lat"],
-                lon=shape["lon"],
-                sequence=shape["sequence"]
-            )
-            for shape in shapes_data
-        ]
+        if packer is not None:
+            insert_packed_shapes(packed_writer, packer)
         
-        db.bulk_save_objects(db_shapes)
+        writer.finish()
+        packed_writer.finish()
+        shape_keys.write()
         db.commit()
         
-        print(f"Successfully loaded {len(db_shapes)} shape points into database")
+        if packer is None:
+            print(f"Successfully loaded {writer.rows_written} shape points into database ({writer.rows_per_second:,.0f} rows/s)")
+            if is_incremental():
+                print(writer.changes)
+        else:
+            print(f"Successfully loaded {packed_writer.rows_written} packed shapes into database ({packed_writer.rows_per_second:,.0f} rows/s)")
+            if is_incremental():
+                print(packed_writer.changes)
     except Exception as e:
         print(f"Error loading shapes: {e}")
         db.rollback()
@@ -47,4 +77,4 @@ def load_shapes():
 
 
 if __name__ == "__main__":
-    load_shapes()
\ No newline at end of file
+    load_shapes()
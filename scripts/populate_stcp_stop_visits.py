@@ -0,0 +1,119 @@
+import sys
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.keys import KeyDictionary
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.normalizer import StopTimeColumns, time_of_day
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
+from app.data_source.gtfs.stcp.models.route_key import RouteKey
+from app.data_source.gtfs.stcp.models.stop_key import StopKey
+from app.data_source.gtfs.stcp.models.stop_visit import StopVisit
+from app.data_source.gtfs.stcp.models.trip import Trip
+from app.data_source.gtfs.stcp.models.trip_key import TripKey
+
+
+# route key, direction_id, service_id, trip_number, headsign by trip key
+TripDetails = Dict[int, Tuple[int, int, str, str, str]]
+
+
+def stop_visits_writer(db: Session) -> BulkWriter:
+    return create_writer(
+        db,
+        StopVisit.__table__,
+        (
+            "trip_key", "stop_key", "stop_sequence",
+            "route_key", "direction_id", "service_id", "trip_number", "headsign",
+            "arrival_time", "departure_time", "arrival_seconds",
+        ),
+    )
+
+
+def load_trip_details(db: Session, trip_keys: KeyDictionary, route_keys: KeyDictionary) -> TripDetails:
+    """
+    The trip columns copied onto every stop visit, read from the trips table
+    the trips step has loaded, so trips.txt is only parsed once.
+    """
+    rows = db.execute(
+        select(Trip.trip_id, Trip.route_id, Trip.direction_id, Trip.service_id, Trip.trip_number, Trip.headsign)
+    )
+    return {
+        trip_keys.key(trip_id): (route_keys.key(route_id), direction_id, service_id, trip_number, headsign)
+        for trip_id, route_id, direction_id, service_id, trip_number, headsign in rows
+    }
+
+
+def insert_stop_visits(
+    writer: BulkWriter,
+    stop_times: StopTimeColumns,
+    trip_keys: Sequence[int],
+    stop_keys: Sequence[int],
+    trips: TripDetails,
+) -> int:
+    # Stop times of trips missing from the trips table cannot be served and are skipped
+    return writer.write(
+        (trip_key, stop_key, stop_sequence, *trip, time_of_day(arrival), time_of_day(departure), arrival)
+        for trip_key, stop_key, stop_sequence, arrival, departure in zip(
+            trip_keys,
+            stop_keys,
+            stop_times.stop_sequence,
+            stop_times.arrival_time,
+            stop_times.departure_time,
+        )
+        if (trip := trips.get(trip_key)) is not None
+    )
+
+
+def load_stop_visits():
+    Base.metadata.create_all(bind=get_engine())
+    
+    loader = GTFSLoader(get_feed_source())
+    
+    print(f"Loading stop_times from {loader.file_location('stop_times.txt')}...")
+    
+    db: Session = SessionLocal()
+    try:
+        writer = stop_visits_writer(db)
+        trip_keys = KeyDictionary(db, TripKey.__table__)
+        stop_keys = KeyDictionary(db, StopKey.__table__)
+        route_keys = KeyDictionary(db, RouteKey.__table__)
+        
+        # Clear old data
+        writer.clear()
+        
+        trips = load_trip_details(db, trip_keys, route_keys)
+        
+        for stop_times in loader.iter_stop_time_columns():
+            insert_stop_visits(
+                writer,
+                stop_times,
+                trip_keys.keys(stop_times.trip_id),
+                stop_keys.keys(stop_times.stop_id),
+                trips,
+            )
+        
+        writer.finish()
+        trip_keys.write()
+        stop_keys.write()
+        route_keys.write()
+        db.commit()
+        
+        print(f"Successfully loaded {writer.rows_written} stop visits into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
+    except Exception as e:
+        print(f"Error loading stop visits: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    load_stop_visits()
@@ -1,44 +1,51 @@
 import sys
 from pathlib import Path
+from typing import List, Dict, Any
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
-from app.core.config import settings
-from app.data_source.gtfs.loader import GTFSLoader
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.stop import Stop as StopModel
 
 
+def stops_writer(db: Session) -> BulkWriter:
+    return create_writer(db, StopModel.__table__, ("id", "name", "lat", "lon", "zone_id"))
+
+
+def insert_stops(writer: BulkWriter, stops_chunk: List[Dict[str, Any]]) -> int:
+    return writer.write(
+        (stop["id"], stop["name"], stop["lat"], stop["lon"], stop["zone_id"])
+        for stop in stops_chunk
+    )
+
+
 def load_stops():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
+    loader = GTFSLoader(get_feed_source())
     
-    print(f"Loading stops from {settings.GTFS_DATA_DIR}/stops.txt...")
-    stops_data = loader.load_stops()
+    print(f"Loading stops from {loader.file_location('stops.txt')}...")
     
     db: Session = SessionLocal()
     try:
+        writer = stops_writer(db)
+        
         # Clear old data
-        db.query(StopModel).delete()
+        writer.clear()
         
-        db_stops = [
-            StopModel(
-                id=stop["id"],
-                name=stop["name"],
-                lat=stop["lat"],
-                lon=stop["lon"],
-                zone_id=stop["zone_id"]
-            )
-            for stop in stops_data
-        ]
+        for stops_chunk in loader.iter_stops():
+            insert_stops(writer, stops_chunk)
         
-        db.bulk_save_objects(db_stops)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(db_stops)} stops into database")
+        print(f"Successfully loaded {writer.rows_written} stops into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading stops: {e}")
         db.rollback()
@@ -1,41 +1,51 @@
 import sys
 from pathlib import Path
+from typing import List, Dict, Any
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
-from app.core.config import settings
-from app.data_source.gtfs.loader import GTFSLoader
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.trip_shape import TripShape
 
 
+def trip_shapes_writer(db: Session) -> BulkWriter:
+    return create_writer(db, TripShape.__table__, ("trip_id", "shape_id"))
+
+
+def insert_trip_shapes(writer: BulkWriter, trip_shapes_chunk: List[Dict[str, Any]]) -> int:
+    return writer.write(
+        (trip_shape["trip_id"], trip_shape["shape_id"])
+        for trip_shape in trip_shapes_chunk
+    )
+
+
 def load_trip_shapes():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
+    loader = GTFSLoader(get_feed_source())
     
-    print(f"Loading trip_shapes from {settings.GTFS_DATA_DIR}/trips.txt...")
-    trip_shapes_data = loader.load_trip_shapes()
+    print(f"Loading trip_shapes from {loader.file_location('trips.txt')}...")
     
     db: Session = SessionLocal()
     try:
+        writer = trip_shapes_writer(db)
+        
         # Clear old data
-        db.query(TripShape).delete()
+        writer.clear()
         
-        db_trip_shapes = [
-            TripShape(
-                trip_id=trip_shape["trip_id"],
-                shape_id=trip_shape["shape_id"]
-            )
-            for trip_shape in trip_shapes_data
-        ]
+        for trip_shapes_chunk in loader.iter_trip_shapes():
+            insert_trip_shapes(writer, trip_shapes_chunk)
         
-        db.bulk_save_objects(db_trip_shapes)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(db_trip_shapes)} trip-shape relationships into database")
+        print(f"Successfully loaded {writer.rows_written} trip-shape relationships into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading trip_shapes: {e}")
         db.rollback()
@@ -45,4 +55,4 @@ def load_trip_shapes():
 
 
 if __name__ == "__main__":
-    load_trip_shapes()
\ No newline at end of file
+    load_trip_shapes()
@@ -1,48 +1,63 @@
 import sys
 from pathlib import Path
+from typing import List, Dict, Any
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
-from app.core.config import settings
-from app.data_source.gtfs.loader import GTFSLoader
-from app.data_source.gtfs.normalizer import GTFSNormalizer
+from app.core.database import SessionLocal, get_engine, Base
+from app.data_source.gtfs.loader import GTFSLoader, get_feed_source
+from app.data_source.gtfs.writer import BulkWriter, create_writer, is_incremental
 from app.data_source.gtfs.stcp.models.trip import Trip
 
 
+def trips_writer(db: Session) -> BulkWriter:
+    return create_writer(
+        db,
+        Trip.__table__,
+        ("trip_id", "route_id", "direction_id", "service_id", "trip_number", "headsign", "wheelchair_accessible"),
+    )
+
+
+def insert_trips(writer: BulkWriter, trips_chunk: List[Dict[str, Any]]) -> int:
+    return writer.write(
+        (
+            trip["trip_id"],
+            trip["route_id"],
+            trip["direction_id"],
+            trip["service_id"],
+            trip["trip_number"],
+            trip["headsign"],
+            trip["wheelchair_accessible"],
+        )
+        for trip in trips_chunk
+    )
+
+
 def load_trips():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     
-    loader = GTFSLoader(settings.GTFS_DATA_DIR)
+    loader = GTFSLoader(get_feed_source())
     
-    print(f"Loading trips from {settings.GTFS_DATA_DIR}/trips.txt...")
-    raw_trips = loader._load_csv_file("trips.txt")
-    normalized_trips = GTFSNormalizer.normalize_trips_for_table(raw_trips)
+    print(f"Loading trips from {loader.file_location('trips.txt')}...")
     
     db: Session = SessionLocal()
     try:
+        writer = trips_writer(db)
+        
         # Clear old data
-        db.query(Trip).delete()
+        writer.clear()
         
-        db_trips = [
-            Trip(
-                trip_id=trip["trip_id"],
-                route_id=trip["route_id"],
-                direction_id=trip["direction_id"],
-                service_id=trip["service_id"],
-                trip_number=trip["trip_number"],
-                headsign=trip["headsign"],
-                wheelchair_accessible=trip["wheelchair_accessible"]
-            )
-            for trip in normalized_trips
-        ]
+        for trips_chunk in loader.iter_trips_for_table():
+            insert_trips(writer, trips_chunk)
         
-        db.bulk_save_objects(db_trips)
+        writer.finish()
         db.commit()
         
-        print(f"Successfully loaded {len(db_trips)} trips into database")
+        print(f"Successfully loaded {writer.rows_written} trips into database ({writer.rows_per_second:,.0f} rows/s)")
+        if is_incremental():
+            print(writer.changes)
     except Exception as e:
         print(f"Error loading trips: {e}")
         db.rollback()
@@ -52,4 +67,4 @@ def load_trips():
 
 
 if __name__ == "__main__":
-    load_trips()
\ No newline at end of file
+    load_trips()
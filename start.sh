@@ -3,18 +3,24 @@ set -e
 
 echo "Starting application..."
 
-# Optionally download GTFS data if AUTO_DOWNLOAD_GTFS is set
-if [ "$AUTO_DOWNLOAD_GTFS" = "true" ]; then
-    echo "Auto-downloading GTFS data..."
-    python scripts/download_gtfs.py || echo "Warning: GTFS download failed, continuing..."
-fi
-
 # Optionally populate database if AUTO_POPULATE_DB is set
+# With AUTO_DOWNLOAD_GTFS as well, the feed is downloaded and loaded from memory
+# without extracting it to disk
 if [ "$AUTO_POPULATE_DB" = "true" ]; then
     echo "Auto-populating database..."
-    python scripts/populate_stcp.py || echo "Warning: Database population failed, continuing to start server..."
+    if [ "$AUTO_DOWNLOAD_GTFS" = "true" ]; then
+        python scripts/populate_stcp.py --download || echo "Warning: Database population failed, continuing to start server..."
+    else
+        python scripts/populate_stcp.py || echo "Warning: Database population failed, continuing to start server..."
+    fi
 else
     echo "Skipping database population (set AUTO_POPULATE_DB=true to enable)"
+    
+    # Optionally download GTFS data if AUTO_DOWNLOAD_GTFS is set
+    if [ "$AUTO_DOWNLOAD_GTFS" = "true" ]; then
+        echo "Auto-downloading GTFS data..."
+        python scripts/download_gtfs.py || echo "Warning: GTFS download failed, continuing..."
+    fi
 fi
 
 # Start the API server